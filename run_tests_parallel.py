@@ -0,0 +1,233 @@
+"""
+Параллельный запуск проверок: то же, что run_tests.sh, но быстрее.
+
+flake8 и проверка структуры выполняются как раньше, затем тесты
+ya_news и ya_note запускаются одновременно, и каждый набор делится
+на шарды по числу процессов. У каждого процесса своя тестовая база
+SQLite: по умолчанию она в памяти процесса, а для баз в файлах
+conftest добавляет к имени суффикс из TEST_DB_SUFFIX. Результаты
+шардов собираются из отчётов JUnit в один общий отчёт. Коды выхода
+совпадают с run_tests.sh: первой сообщается ошибка flake8, затем
+структуры, затем тестов ya_news и ya_note.
+
+    python run_tests_parallel.py --workers 4
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+from xml.etree import ElementTree
+
+BASE_DIR = Path(__file__).resolve().parent
+
+Project = namedtuple('Project', ('name', 'title', 'path', 'settings'))
+
+PROJECTS = (
+    Project('ya_news', 'YaNews', BASE_DIR / 'ya_news', 'yanews.settings_test'),
+    Project('ya_note', 'YaNote', BASE_DIR / 'ya_note', 'yanote.settings_test'),
+)
+
+Shard = namedtuple('Shard', ('project', 'index', 'node_ids'))
+
+
+def print_message(message, symbol, error=False):
+    """Строка на всю ширину терминала, как print_message в run_tests.sh."""
+    width = shutil.get_terminal_size().columns
+    color = '\033[0;31m' if error else '\033[0;32m'
+    print(f'{color}{message.center(width, symbol)}\033[0m', file=sys.stderr)
+
+
+def project_env(project, **extra):
+    """
+    Окружение процессов проекта.
+
+    DJANGO_SETTINGS_MODULE из окружения действует только на проект,
+    которому принадлежит модуль, например yanews.settings — только
+    на ya_news. Второй проект запускается со своими settings_test,
+    как в run_tests.sh.
+    """
+    env = dict(os.environ, **extra)
+    package = project.settings.partition('.')[0]
+    override = env.get('DJANGO_SETTINGS_MODULE', '')
+    if override.partition('.')[0] != package:
+        env['DJANGO_SETTINGS_MODULE'] = project.settings
+    return env
+
+
+def collect(project):
+    """Идентификаторы всех тестов проекта."""
+    result = subprocess.run(
+        [
+            sys.executable, '-m', 'pytest', '--collect-only', '-q',
+            '-o', 'addopts=', '-p', 'no:cacheprovider',
+        ],
+        cwd=project.path,
+        env=project_env(project),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stdout + result.stderr)
+        return None
+    return [line for line in result.stdout.splitlines() if '::' in line]
+
+
+def group_key(node_id):
+    """
+    Тесты одного класса идут в один шард: setUpTestData
+    выполняется раз на класс, и дробить его невыгодно.
+    """
+    parts = node_id.split('::')
+    if len(parts) > 2:
+        return '::'.join(parts[:2])
+    return node_id
+
+
+def make_shards(project, node_ids, workers):
+    groups = {}
+    for node_id in node_ids:
+        groups.setdefault(group_key(node_id), []).append(node_id)
+    shards = [[] for _ in range(min(workers, len(groups)))]
+    # Самые большие группы раскладываем первыми в наименее занятый шард.
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return [
+        Shard(project, index, shard_ids)
+        for index, shard_ids in enumerate(shards)
+    ]
+
+
+def start(shard, directory):
+    name = f'{shard.project.name}-{shard.index}'
+    log = open(directory / f'{name}.log', 'w')
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'pytest', '--tb=line', '-q',
+            '-o', 'addopts=', '-p', 'no:cacheprovider',
+            f'--junitxml={directory / f"{name}.xml"}',
+            *shard.node_ids,
+        ],
+        cwd=shard.project.path,
+        env=project_env(shard.project, TEST_DB_SUFFIX=name),
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    return process, log
+
+
+def read_report(path):
+    """Итоги и упавшие тесты из отчёта JUnit одного шарда."""
+    totals = dict.fromkeys(('tests', 'failures', 'errors', 'skipped'), 0)
+    failed = []
+    if not path.exists():
+        return totals, failed
+    for suite in ElementTree.parse(path).getroot().iter('testsuite'):
+        for key in totals:
+            totals[key] += int(suite.get(key, 0))
+        for case in suite.iter('testcase'):
+            problem = case.find('failure')
+            if problem is None:
+                problem = case.find('error')
+            if problem is not None:
+                failed.append((
+                    f'{case.get("classname")}::{case.get("name")}',
+                    problem.get('message', ''),
+                ))
+    return totals, failed
+
+
+def run_tests(workers):
+    """Запускает шарды обоих проектов и возвращает коды выхода проектов."""
+    shards = []
+    for project in PROJECTS:
+        node_ids = collect(project)
+        if node_ids is None:
+            return {project.name: 2}
+        shards += make_shards(project, node_ids, workers)
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        started = time.perf_counter()
+        running = [(shard, *start(shard, directory)) for shard in shards]
+        statuses = {project.name: 0 for project in PROJECTS}
+        totals = {project.name: {} for project in PROJECTS}
+        failed = []
+        for shard, process, log in running:
+            status = process.wait()
+            log.close()
+            name = f'{shard.project.name}-{shard.index}'
+            statuses[shard.project.name] = max(
+                statuses[shard.project.name], status
+            )
+            shard_totals, shard_failed = read_report(directory / f'{name}.xml')
+            for key, value in shard_totals.items():
+                project_totals = totals[shard.project.name]
+                project_totals[key] = project_totals.get(key, 0) + value
+            failed += [(shard.project.name, *item) for item in shard_failed]
+            if status != 0:
+                sys.stderr.write((directory / f'{name}.log').read_text())
+        elapsed = time.perf_counter() - started
+    for name, project_totals in totals.items():
+        print(
+            f'{name}: тестов {project_totals.get("tests", 0)}, '
+            f'падений {project_totals.get("failures", 0)}, '
+            f'ошибок {project_totals.get("errors", 0)}, '
+            f'пропущено {project_totals.get("skipped", 0)}',
+            file=sys.stderr,
+        )
+    for name, node_id, message in failed:
+        print(f'FAILED {name} {node_id} - {message}', file=sys.stderr)
+    print(
+        f'Шардов: {len(shards)}, общее время {elapsed:.1f} с', file=sys.stderr
+    )
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Число процессов на каждый проект.',
+    )
+    args = parser.parse_args()
+    status = subprocess.run(
+        [sys.executable, '-m', 'flake8', '--config=setup.cfg'], cwd=BASE_DIR
+    ).returncode
+    if status != 0:
+        print_message(
+            ' flake8 обнаружил отклонения от стандартов, '
+            'приведите код в соответствие с PEP8 ', '=', error=True
+        )
+        return status
+    print_message(
+        ' flake8 завершил проверку кода, ошибок не обнаружено ', '='
+    )
+    status = subprocess.run(
+        [sys.executable, 'structure_test.py'], cwd=BASE_DIR
+    ).returncode
+    if status != 0:
+        print_message(
+            ' Убедитесь, что написанные вами тесты скопированы '
+            'в указанные в ТЗ директории ', '=', error=True
+        )
+        return status
+    statuses = run_tests(max(1, args.workers))
+    for project in PROJECTS:
+        status = statuses.get(project.name, 0)
+        if status != 0:
+            print_message(
+                f' При запуске упали ваши тесты для проекта {project.title}. '
+                'Проверьте тесты этого проекта ', '=', error=True
+            )
+            return status
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
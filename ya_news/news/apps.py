@@ -1,7 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+from yacommon.db import create_fts_without_migrations
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+    # Индекс FTS5 и миграция с его SQL, см. create_fts_without_migrations.
+    fts_table = 'news_news_fts'
+    fts_migration = 'news.migrations.0004_news_fts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(create_fts_without_migrations, sender=self)
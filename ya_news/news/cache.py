@@ -0,0 +1,113 @@
+"""
+Версионированный кеш HTML-фрагментов.
+
+Каждый фрагмент привязан к области (scope) с текущей версией.
+Сигналы моделей меняют версию, и при следующем запросе фрагмент
+пересобирается. Пересборку выполняет только тот воркер, который
+захватил блокировку, остальные в это время отдают устаревшую копию.
+Используются только get/set/add/delete, поэтому подходит любой
+бэкенд кеша, но он должен быть общим для всех воркеров: версия,
+сменённая в одном процессе, иначе не видна в остальных. locmem
+годится только для одного процесса, см. settings_prod.
+
+Блокировка пересборки не строгая: она держится на cache.add,
+а атомарен он не во всех бэкендах. В memcached и Redis add атомарен,
+в FileBasedCache это проверка файла и запись следом, и два процесса
+могут захватить блокировку одновременно. Тогда фрагмент соберут
+оба: лишняя работа, но не ошибка — версия у сборок одна, и последняя
+запись просто заменит первую.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from yacommon.routers import primary_reads
+
+FEED_SCOPE = 'news-feed'
+
+VERSION_KEY = 'fragment-version:{scope}'
+CHANGED_KEY = 'fragment-changed:{scope}'
+FRAGMENT_KEY = 'fragment:{scope}'
+LOCK_KEY = 'fragment-lock:{scope}'
+
+
+def get_version(scope):
+    """Текущая версия области; создаётся при первом обращении."""
+    key = VERSION_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def news_scope(news_id):
+    """Область страницы отдельной новости."""
+    return f'news-{news_id}'
+
+
+def bump_version(scope):
+    """Делает все закешированные фрагменты области устаревшими."""
+    cache.set(VERSION_KEY.format(scope=scope), uuid.uuid4().hex, timeout=None)
+    cache.set(CHANGED_KEY.format(scope=scope), timezone.now(), timeout=None)
+
+
+def bump_version_on_commit(scope, using=None):
+    """
+    Меняет версию области после фиксации текущей транзакции.
+
+    До фиксации другие соединения видят старые данные: под новой
+    версией закешировался бы устаревший фрагмент, а по новому времени
+    изменения клиент получал бы 304 для старой страницы.
+    Вне транзакции версия меняется сразу.
+    """
+    transaction.on_commit(lambda: bump_version(scope), using=using)
+
+
+def get_changed_at(scope):
+    """
+    Время последнего изменения области.
+
+    Если кеш очищен, считаем, что область изменилась только что.
+    """
+    key = CHANGED_KEY.format(scope=scope)
+    cache.add(key, timezone.now(), timeout=None)
+    return cache.get(key)
+
+
+def get_fragment(scope, build):
+    """
+    Возвращает фрагмент текущей версии, при необходимости собирая его.
+
+    Если фрагмент устарел, а блокировку пересборки держит другой
+    воркер, отдаём устаревшую копию, не дожидаясь новой.
+
+    Фрагмент собирается по основной базе: отставшая реплика
+    закешировала бы старые данные под уже новой версией.
+    """
+    version = get_version(scope)
+    fragment_key = FRAGMENT_KEY.format(scope=scope)
+    cached = cache.get(fragment_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    lock_key = LOCK_KEY.format(scope=scope)
+    locked = cache.add(
+        lock_key, version, timeout=settings.FRAGMENT_CACHE_LOCK_TIMEOUT
+    )
+    if not locked and cached is not None:
+        return cached[1]
+    try:
+        with primary_reads():
+            fragment = build()
+        cache.set(
+            fragment_key,
+            (version, fragment),
+            timeout=settings.FRAGMENT_CACHE_TIMEOUT,
+        )
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return fragment
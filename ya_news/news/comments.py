@@ -0,0 +1,61 @@
+"""
+Общий для всех пользователей фрагмент списка комментариев.
+
+Список рендерится без пользователя, поэтому одну копию можно
+кешировать по версии новости и отдавать всем. Вместо ссылок
+«Редактировать | Удалить» в нём стоят метки с id комментария
+и id автора. Второй проход подставляет ссылки только в комментарии
+текущего пользователя и к базе не обращается.
+"""
+import re
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cache import get_fragment, news_scope
+from .pagination import get_comments_page
+
+OWNER_CONTROLS = re.compile(r'<!--owner-controls:(\d+):(\d+)-->')
+
+
+def render_comments(news_id, comments, next_cursor):
+    """HTML страницы комментариев с метками вместо ссылок автора."""
+    return render_to_string('news/includes/comments.html', {
+        'news_id': news_id,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    })
+
+
+def get_first_comments_page(news_id):
+    """
+    Первая страница комментариев из кеша текущей версии новости.
+
+    Возвращает словарь с HTML, id показанных комментариев
+    и курсором следующей страницы.
+    """
+    def build():
+        comments, next_cursor = get_comments_page(news_id)
+        return {
+            'html': render_comments(news_id, comments, next_cursor),
+            'comment_ids': [comment.pk for comment in comments],
+            'next_cursor': next_cursor,
+        }
+
+    return get_fragment(news_scope(news_id), build)
+
+
+def render_owner_controls(html, user):
+    """Заменяет метки ссылками автора или убирает их."""
+    user_id = user.pk if user.is_authenticated else None
+
+    def replace(match):
+        comment_id, author_id = map(int, match.groups())
+        if author_id != user_id:
+            return ''
+        return render_to_string(
+            'news/includes/comment_controls.html',
+            {'comment_id': comment_id},
+        )
+
+    return mark_safe(OWNER_CONTROLS.sub(replace, html))
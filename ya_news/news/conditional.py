@@ -0,0 +1,81 @@
+"""
+Валидаторы ETag и Last-Modified для страниц новостей.
+
+Они считаются без загрузки комментариев и рендеринга шаблонов,
+поэтому ответ 304 обходится максимум в один лёгкий запрос.
+Страницы авторизованных пользователей различаются (ссылки на
+редактирование своих комментариев), поэтому в ETag входит id
+пользователя, а Last-Modified для них не отдаётся.
+"""
+import hashlib
+
+from django.db.models import OuterRef, Subquery
+
+from .cache import FEED_SCOPE, get_changed_at, get_version, news_scope
+from .models import Comment, News
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        ':'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def user_variant(request):
+    return request.user.pk if request.user.is_authenticated else 0
+
+
+def get_news_state(request, pk):
+    """
+    Дата новости, число комментариев и время последнего из них.
+
+    Считается одним запросом и запоминается на время обработки
+    запроса, так как нужна обоим валидаторам.
+    """
+    if not hasattr(request, '_news_state'):
+        last_comment = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by('-created').values('created')[:1]
+        request._news_state = News.objects.filter(pk=pk).annotate(
+            last_comment=Subquery(last_comment)
+        ).values('date', 'comment_count', 'last_comment').first()
+    return request._news_state
+
+
+def news_detail_etag(request, pk, *args, **kwargs):
+    state = get_news_state(request, pk)
+    if state is None:
+        return None
+    return make_etag(
+        pk,
+        state['date'],
+        state['comment_count'],
+        state['last_comment'],
+        get_version(news_scope(pk)),
+        user_variant(request),
+    )
+
+
+def news_detail_last_modified(request, pk, *args, **kwargs):
+    """
+    Время последнего изменения страницы новости.
+
+    Берётся из кеша: версию и время области меняет любое изменение
+    новости и её комментариев, в том числе правка текста и удаление.
+    """
+    if request.user.is_authenticated:
+        return None
+    if get_news_state(request, pk) is None:
+        return None
+    return get_changed_at(news_scope(pk))
+
+
+def news_list_etag(request, *args, **kwargs):
+    """Лента меняется вместе с версией её кеша, запросов к базе нет."""
+    return make_etag(get_version(FEED_SCOPE), user_variant(request))
+
+
+def news_list_last_modified(request, *args, **kwargs):
+    if request.user.is_authenticated:
+        return None
+    return get_changed_at(FEED_SCOPE)
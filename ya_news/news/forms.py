@@ -2,6 +2,7 @@ from django.core.exceptions import ValidationError
 from django.forms import ModelForm
 
 from .models import Comment
+from .moderation import BadWordsMatcher
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +11,14 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = BadWordsMatcher(BAD_WORDS)
+
+
+def validate_comment_text(text):
+    """Не позволяем ругаться в комментариях."""
+    if bad_words.search(text):
+        raise ValidationError(WARNING)
+
 
 class CommentForm(ModelForm):
 
@@ -18,10 +27,6 @@ class CommentForm(ModelForm):
         fields = ('text',)
 
     def clean_text(self):
-        """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        validate_comment_text(text)
         return text
@@ -0,0 +1,61 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.moderation import build_pattern
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, min_length=4, max_length=12):
+    length = rng.randint(min_length, max_length)
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает проверку запрещённых слов циклом по списку '
+        'и скомпилированным выражением.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=5000)
+        parser.add_argument('--text-length', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        text = ' '.join(
+            random_word(rng, 2, 8) for _ in range(options['text_length'] // 6)
+        )[:options['text_length']]
+        # Худший случай: запрещённых слов в тексте нет,
+        # и обоим способам приходится просмотреть его целиком.
+        words = []
+        while len(words) < options['words']:
+            word = random_word(rng)
+            if word not in text:
+                words.append(word)
+        words = tuple(words)
+        repeat = options['repeat']
+
+        def loop():
+            return any(word in text for word in words)
+
+        build_time = timeit.timeit(lambda: build_pattern(words), number=1)
+        pattern = build_pattern(words)
+
+        def compiled():
+            return pattern.search(text) is not None
+
+        assert loop() == compiled()
+        loop_time = timeit.timeit(loop, number=repeat) / repeat
+        compiled_time = timeit.timeit(compiled, number=repeat) / repeat
+        self.stdout.write(
+            f'Слов: {len(words)}, длина текста: {len(text)}\n'
+            f'Сборка выражения: {build_time * 1000:.1f} мс\n'
+            f'Цикл по списку:   {loop_time * 1000:.3f} мс на текст\n'
+            f'Одно выражение:   {compiled_time * 1000:.3f} мс на текст\n'
+            f'Ускорение:        {loop_time / compiled_time:.1f}x'
+        )
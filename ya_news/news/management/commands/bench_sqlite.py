@@ -0,0 +1,171 @@
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+from importlib import import_module
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connections
+
+from news.models import Comment, News
+from news.pagination import get_comments_page
+from yacommon.benchmarks import summarize
+
+User = get_user_model()
+
+
+def copy_database(source, target):
+    """Копирует базу через backup API и возвращает обычный журнал."""
+    with closing(sqlite3.connect(source)) as src:
+        with closing(sqlite3.connect(target)) as dst:
+            src.backup(dst)
+            dst.execute('PRAGMA journal_mode = delete')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при параллельных '
+        'чтениях и записях комментариев в текущей и боевой конфигурации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--operations',
+            type=int,
+            default=300,
+            help='Число операций на один поток.',
+        )
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--production-settings',
+            default='yanews.settings_prod',
+            help='Модуль настроек, из которого берётся боевая база.',
+        )
+
+    def handle(self, *args, **options):
+        database = connections['default'].settings_dict
+        if database['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Замер имеет смысл только для SQLite.')
+        self.news_ids = list(
+            News.objects.order_by('-comment_count').values_list(
+                'pk', flat=True
+            )[:100]
+        )
+        self.user_ids = list(User.objects.values_list('pk', flat=True)[:1000])
+        if not self.news_ids or not self.user_ids:
+            raise CommandError('База пуста, сначала запустите seed_data.')
+        production = import_module(
+            options['production_settings']
+        ).DATABASES['default']
+        profiles = {
+            'current': {'CONN_MAX_AGE': 0, 'PRAGMAS': {}},
+            'production': {
+                'CONN_MAX_AGE': production.get('CONN_MAX_AGE', 0),
+                'PRAGMAS': production.get('PRAGMAS', {}),
+            },
+        }
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, profile in profiles.items():
+                # Каждый профиль получает свою копию исходной базы.
+                target = Path(directory) / f'{name}.sqlite3'
+                copy_database(database['NAME'], target)
+                results[name] = self.run_profile(
+                    {**database, **profile, 'NAME': target}, options
+                )
+                self.report(name, results[name])
+        current = results['current']['throughput']
+        production = results['production']['throughput']
+        self.stdout.write(
+            f'Боевая конфигурация быстрее в {production / current:.1f} раза'
+        )
+
+    def run_profile(self, database, options):
+        """Подменяет настройки default и гоняет потоки на копии базы."""
+        original = connections.databases['default']
+        connections['default'].close()
+        del connections['default']
+        connections.databases['default'] = database
+        timings = {'read': [], 'write': []}
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['threads'])
+        workers = [
+            threading.Thread(
+                target=self.worker,
+                args=(
+                    random.Random(options['seed'] + index),
+                    barrier, lock, timings, errors, options,
+                ),
+            )
+            for index in range(options['threads'])
+        ]
+        started = time.perf_counter()
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            elapsed = time.perf_counter() - started
+            connections.databases['default'] = original
+        done = len(timings['read']) + len(timings['write'])
+        return {
+            'throughput': done / elapsed,
+            'errors': len(errors),
+            'read': summarize(timings['read']) if timings['read'] else None,
+            'write': summarize(timings['write']) if timings['write'] else None,
+        }
+
+    def worker(self, rng, barrier, lock, timings, errors, options):
+        barrier.wait()
+        try:
+            for _ in range(options['operations']):
+                kind = (
+                    'write' if rng.random() < options['write_ratio']
+                    else 'read'
+                )
+                news_id = rng.choice(self.news_ids)
+                started = time.perf_counter()
+                try:
+                    if kind == 'write':
+                        Comment.objects.create(
+                            news_id=news_id,
+                            author_id=rng.choice(self.user_ids),
+                            text='Комментарий из нагрузочного теста',
+                        )
+                    else:
+                        get_comments_page(news_id)
+                except OperationalError as error:
+                    with lock:
+                        errors.append(error)
+                    continue
+                finally:
+                    # Конец «запроса»: без CONN_MAX_AGE соединение
+                    # закрывается, как после настоящего HTTP-запроса.
+                    close_old_connections()
+                with lock:
+                    timings[kind].append(
+                        (time.perf_counter() - started) * 1000
+                    )
+        finally:
+            connections.close_all()
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name}: {result["throughput"]:.0f} операций/с, '
+            f'ошибок {result["errors"]}'
+        )
+        for kind in ('read', 'write'):
+            if result[kind]:
+                self.stdout.write(
+                    f'  {kind}: p50 {result[kind]["p50"]:.2f} мс, '
+                    f'p95 {result[kind]["p95"]:.2f} мс, '
+                    f'p99 {result[kind]["p99"]:.2f} мс'
+                )
@@ -0,0 +1,44 @@
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from news import urls
+from news.models import Comment, News
+from yacommon.benchmarks import UrlBenchmarkCommand
+
+
+class Command(UrlBenchmarkCommand):
+    help = (
+        'Замеряет p50/p95/p99 времени ответа и число SQL-запросов '
+        'для каждого именованного адреса news.urls.'
+    )
+    project = 'ya_news'
+    urls = urls
+
+    def prepare(self):
+        # Самая обсуждаемая новость — худший случай для страницы новости.
+        news = News.objects.order_by('-comment_count').first()
+        if news is None:
+            raise CommandError('База пуста, сначала запустите seed_data.')
+        comment = Comment.objects.filter(news=news).order_by('pk').first()
+        if comment is None:
+            raise CommandError('У новостей нет комментариев.')
+        query = news.title.split()[0]
+        return comment.author, {
+            'news:home': (reverse('news:home'), {}),
+            'news:search': (reverse('news:search'), {'q': query}),
+            'news:detail': (reverse('news:detail', args=(news.pk,)), {}),
+            'news:comments': (
+                reverse('news:comments', args=(news.pk,)), {}
+            ),
+            'news:edit': (reverse('news:edit', args=(comment.pk,)), {}),
+            'news:delete': (reverse('news:delete', args=(comment.pk,)), {}),
+            # Выгрузка читает весь архив: её время зависит от объёма
+            # базы, а не от запроса, замеряйте её командой export_news.
+            'news:export': None,
+        }
+
+    def count_rows(self):
+        return {
+            'news': News.objects.count(),
+            'comments': Comment.objects.count(),
+        }
@@ -0,0 +1,65 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news.export import FORMATS, NewsExport
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает архив новостей с комментариями в NDJSON или CSV '
+        'потоком, не загружая таблицы в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать выгрузку gzip.'
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для выгрузки, «-» — стандартный вывод.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EXPORT_NEWS_BATCH_SIZE,
+            help='Сколько новостей читать за один запрос.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.EXPORT_COMMENTS_CHUNK_SIZE,
+            help='Сколько комментариев iterator() забирает за раз.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('Размеры пачек должны быть положительными.')
+        export = NewsExport(
+            options['format'],
+            options['gzip'],
+            options['batch_size'],
+            options['chunk_size'],
+        )
+        started = time.perf_counter()
+        if options['output'] == '-':
+            self.write(export, sys.stdout.buffer)
+            sys.stdout.flush()
+        else:
+            with open(options['output'], 'wb') as file:
+                self.write(export, file)
+        elapsed = time.perf_counter() - started
+        # Отчёт идёт в stderr, чтобы не смешаться с выгрузкой в stdout.
+        self.stderr.write(
+            f'Выгружено записей: {export.rows} за {elapsed:.1f} с '
+            f'({export.rows / max(elapsed, 1e-9):.0f} записей/с)',
+            style_func=self.style.SUCCESS,
+        )
+
+    def write(self, export, file):
+        for chunk in export:
+            file.write(chunk)
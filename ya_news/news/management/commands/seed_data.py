@@ -0,0 +1,51 @@
+from datetime import timedelta
+from itertools import accumulate
+
+from django.utils import timezone
+
+from news.models import Comment, News
+from yacommon.seeding import SeedCommand
+
+
+class Command(SeedCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями '
+        'и комментариями для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--news', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+
+    def seed_models(self, run, user_ids, options):
+        news_ids = self.seed_with_ids(
+            'новостей', News, self.news(options['news'])
+        )
+        self.seed(
+            'комментариев',
+            Comment,
+            self.comments(news_ids, user_ids, options['comments']),
+        )
+
+    def news(self, count):
+        today = timezone.localdate()
+        for _ in range(count):
+            yield News(
+                title=self.words(self.rng.randint(3, 8)).capitalize(),
+                text=self.words(self.rng.randint(50, 200)),
+                date=today - timedelta(days=self.rng.randint(0, 3650)),
+            )
+
+    def comments(self, news_ids, user_ids, count):
+        # Обсуждение распределено по закону Ципфа: несколько
+        # новостей собирают большую часть комментариев.
+        cum_weights = list(
+            accumulate(1 / rank for rank in range(1, len(news_ids) + 1))
+        )
+        for _ in range(count):
+            yield Comment(
+                news_id=self.rng.choices(news_ids, cum_weights=cum_weights)[0],
+                author_id=self.rng.choice(user_ids),
+                text=self.words(self.rng.randint(5, 40)),
+            )
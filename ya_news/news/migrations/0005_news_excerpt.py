@@ -0,0 +1,55 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:52
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+EXCERPT_WORDS = 15
+
+news_fts = import_module('news.migrations.0004_news_fts')
+
+
+def fill_excerpt(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    last_id = 0
+    while True:
+        batch = list(
+            News.objects.filter(pk__gt=last_id).order_by('pk')
+            .only('pk', 'text')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for news in batch:
+            news.excerpt = Truncator(news.text).words(
+                EXCERPT_WORDS, truncate=' …'
+            )
+        News.objects.bulk_update(batch, ['excerpt'])
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_fts'),
+    ]
+
+    operations = [
+        # Добавление столбца пересоздаёт таблицу в SQLite и удаляет
+        # триггеры индекса, поэтому индекс снимается и строится заново.
+        migrations.RunPython(
+            news_fts.run_sqlite(news_fts.DROP_SQL),
+            news_fts.run_sqlite(news_fts.CREATE_SQL),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(fill_excerpt, migrations.RunPython.noop),
+        migrations.RunPython(
+            news_fts.run_sqlite(news_fts.CREATE_SQL),
+            news_fts.run_sqlite(news_fts.DROP_SQL),
+        ),
+    ]
@@ -1,13 +1,100 @@
+from collections import Counter
 from datetime import datetime
+from itertools import islice
 
 from django.conf import settings
-from django.db import models
+from django.db import models, router
+from django.db.models.functions import Coalesce
+from django.utils.text import Truncator
+
+from .cache import FEED_SCOPE, bump_version_on_commit, news_scope
+
+
+COUNTER_UPDATE_CHUNK = 500
+
+# Сколько слов текста показывает лента на главной.
+EXCERPT_WORDS = 15
+
+
+def make_excerpt(text):
+    """Анонс новости, как его давал фильтр truncatewords:15."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        bulk_create не вызывает save() и не отправляет сигналы,
+        поэтому анонсы заполняем, а ленту обновляем явно.
+        """
+        objs = list(objs)
+        for news in objs:
+            news.excerpt = make_excerpt(news.text)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_version_on_commit(FEED_SCOPE, using=self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """
+        Вместе с текстом обновляет и анонс. Сигналов bulk_update
+        тоже не отправляет, поэтому ленту и страницы изменённых
+        новостей обновляем явно.
+        """
+        objs = list(objs)
+        if 'text' in fields and 'excerpt' not in fields:
+            for news in objs:
+                news.excerpt = make_excerpt(news.text)
+            fields = [*fields, 'excerpt']
+        result = super().bulk_update(objs, fields, *args, **kwargs)
+        if objs:
+            bump_version_on_commit(FEED_SCOPE, using=self.db)
+            for news in objs:
+                bump_version_on_commit(news_scope(news.pk), using=self.db)
+        return result
+
+    def update_comment_count(self):
+        """Пересчитывает счётчик комментариев по таблице комментариев."""
+        totals = Comment.objects.filter(
+            news=models.OuterRef('pk')
+        ).order_by().values('news').annotate(
+            total=models.Count('pk')
+        ).values('total')
+        return self.update(
+            comment_count=Coalesce(models.Subquery(totals), 0)
+        )
+
+    def increase_comment_count(self, added):
+        """
+        Увеличивает счётчики на заданные величины.
+
+        added — словарь {id новости: число новых комментариев};
+        обновление идёт одним UPDATE с CASE на каждую пачку новостей.
+        """
+        items = iter(added.items())
+        while chunk := dict(islice(items, COUNTER_UPDATE_CHUNK)):
+            self.filter(pk__in=chunk).update(
+                comment_count=models.F('comment_count') + models.Case(
+                    *(
+                        models.When(pk=pk, then=models.Value(count))
+                        for pk, count in chunk.items()
+                    ),
+                    default=models.Value(0),
+                    output_field=models.PositiveIntegerField(),
+                )
+            )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Лента не загружает text. Анонс пересчитывается в save(),
+    # bulk_create() и bulk_update(), но не в QuerySet.update().
+    excerpt = models.TextField(default='', editable=False)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
@@ -17,6 +104,74 @@ class News(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Без загруженного текста анонс не меняется: text не сохраняется.
+        if 'text' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        return super().save(*args, **kwargs)
+
+
+def comments_removed(news_ids, using):
+    """
+    Пересчитывает счётчики новостей, потерявших комментарии,
+    и обновляет их кеш: один UPDATE на пачку новостей.
+
+    Удалённых вместе с комментариями новостей уже нет в таблице,
+    их счётчики не трогаются.
+    """
+    news_ids = set(news_ids)
+    items = iter(news_ids)
+    while chunk := list(islice(items, COUNTER_UPDATE_CHUNK)):
+        News.objects.using(using).filter(
+            pk__in=chunk
+        ).update_comment_count()
+    if news_ids:
+        bump_version_on_commit(FEED_SCOPE, using=using)
+    for news_id in news_ids:
+        bump_version_on_commit(news_scope(news_id), using=using)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        """
+        bulk_create не отправляет сигналы, поэтому счётчики
+        затронутых новостей обновляем здесь же.
+
+        С ignore_conflicts часть строк могла не вставиться,
+        тогда счётчики пересчитываются по таблице комментариев.
+        """
+        objs = super().bulk_create(
+            objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts
+        )
+        added = Counter(comment.news_id for comment in objs)
+        if not added:
+            return objs
+        if ignore_conflicts:
+            News.objects.filter(pk__in=added).update_comment_count()
+        else:
+            News.objects.increase_comment_count(added)
+        bump_version_on_commit(FEED_SCOPE, using=self.db)
+        for news_id in added:
+            bump_version_on_commit(news_scope(news_id), using=self.db)
+        return objs
+
+    def delete(self):
+        """
+        У Comment нет обработчиков удаления, и Django удаляет строки
+        одним DELETE без загрузки объектов. Счётчики и кеш новостей
+        обновляются после него по одному разу на новость.
+        """
+        news_ids = set(
+            self.order_by().values_list('news_id', flat=True).distinct()
+        )
+        result = super().delete()
+        comments_removed(news_ids, using=self.db)
+        return result
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -30,8 +185,28 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    # Обработчиков pre_delete и post_delete у Comment нет намеренно:
+    # без них каскад от News и пользователя удаляет комментарии одним
+    # запросом, а не по одному. Счётчики обновляют delete() модели
+    # и CommentQuerySet.delete(), каскад от пользователя — его сигналы
+    # в news.signals; при удалении новости её счётчик не нужен.
+
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_id_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(Comment, instance=self)
+        result = super().delete(using=using, keep_parents=keep_parents)
+        comments_removed({self.news_id}, using=using)
+        return result
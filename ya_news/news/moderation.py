@@ -0,0 +1,86 @@
+"""
+Поиск запрещённых слов в тексте комментария.
+
+Все слова собираются в одно регулярное выражение по префиксному
+дереву: ветки с общим началом проверяются один раз, поэтому
+стоимость проверки почти не зависит от длины списка.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+WORD_END = ''
+
+
+def load_words(path):
+    """Читает словарь: одно слово на строку, пустые строки пропускаются."""
+    with open(path, encoding='utf-8') as file:
+        return tuple(
+            line.strip().lower() for line in file if line.strip()
+        )
+
+
+def build_pattern(words):
+    """Компилирует список слов в одно выражение."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            if WORD_END in node:
+                # Более короткое слово уже найдёт любое продолжение.
+                break
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[WORD_END] = {}
+    if not trie:
+        return None
+    return re.compile(_trie_to_regex(trie))
+
+
+def _trie_to_regex(node):
+    if WORD_END in node:
+        return ''
+    alternatives = [
+        re.escape(char) + _trie_to_regex(child)
+        for char, child in sorted(node.items())
+    ]
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')'
+
+
+class BadWordsMatcher:
+    """
+    Проверяет текст на запрещённые слова.
+
+    К встроенному списку добавляются слова из файла
+    settings.BAD_WORDS_FILE. Файл перечитывается при изменении
+    времени модификации, перезапуск сервера не нужен.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(words)
+        self._compiled = (None, None)
+
+    def _get_pattern(self):
+        path = settings.BAD_WORDS_FILE
+        try:
+            key = (path, os.stat(path).st_mtime_ns if path else None)
+        except OSError as error:
+            raise ImproperlyConfigured(
+                f'Не удалось прочитать BAD_WORDS_FILE: {error}'
+            ) from error
+        compiled_key, pattern = self._compiled
+        if key != compiled_key:
+            words = self.words + load_words(path) if path else self.words
+            pattern = build_pattern(words)
+            self._compiled = (key, pattern)
+        return pattern
+
+    def search(self, text):
+        """Есть ли в тексте запрещённое слово, без учёта регистра."""
+        pattern = self._get_pattern()
+        return pattern is not None and pattern.search(text.lower()) is not None
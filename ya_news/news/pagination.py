@@ -0,0 +1,66 @@
+"""Курсорная (keyset) пагинация."""
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Comment
+
+CURSOR_SEPARATOR = '|'
+
+
+def pack_cursor(*values):
+    """Упаковывает ключ последней показанной записи в непрозрачную строку."""
+    raw = CURSOR_SEPARATOR.join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def unpack_cursor(cursor, *parsers):
+    """
+    Распаковывает курсор, применяя к частям ключа парсеры по порядку.
+
+    Для испорченного курсора выбрасывает ValueError.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        parts = raw.split(CURSOR_SEPARATOR)
+        if len(parts) != len(parsers):
+            raise ValueError(cursor)
+        return tuple(parse(part) for parse, part in zip(parsers, parts))
+    except (binascii.Error, UnicodeError, ValueError) as error:
+        raise ValueError(f'Некорректный курсор: {cursor}') from error
+
+
+def encode_cursor(comment):
+    """Курсор указывает на последний показанный комментарий."""
+    return pack_cursor(comment.created.isoformat(), comment.pk)
+
+
+def decode_cursor(cursor):
+    """Возвращает пару (created, id) из курсора комментариев."""
+    return unpack_cursor(cursor, datetime.fromisoformat, int)
+
+
+def get_comments_page(news_id, cursor=None, size=None):
+    """
+    Возвращает страницу комментариев новости и курсор следующей.
+
+    Выборка идёт по индексу (news_id, created, id), поэтому
+    стоимость страницы не зависит от её номера.
+    """
+    size = size or settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    comments = Comment.objects.filter(news_id=news_id)
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        comments = comments.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    comments = list(
+        comments.select_related('author').order_by('created', 'pk')[:size + 1]
+    )
+    if len(comments) > size:
+        comments = comments[:size]
+        return comments, encode_cursor(comments[-1])
+    return comments, None
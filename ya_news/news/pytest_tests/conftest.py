@@ -2,10 +2,20 @@ from datetime import datetime, timedelta
 
 import pytest
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.test.client import Client
 from django.urls import reverse
+from django.utils import timezone
 
 from news.models import Comment, News
+from yacommon.routers import PrimaryReplicaRouter
+from yacommon.testing.snapshots import dataset
+
+User = get_user_model()
+
+LARGE_FEED_NEWS = 2000
+LARGE_FEED_COMMENTED = 100
+LARGE_FEED_COMMENTS_PER_NEWS = 10
 
 
 @pytest.fixture(autouse=True)
@@ -13,6 +23,24 @@ def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture
+def read_aliases(monkeypatch):
+    """Фикстура, записывающая, с какой базы читались модели news."""
+    aliases = []
+    db_for_read = PrimaryReplicaRouter.db_for_read
+
+    def recording_db_for_read(router, model, **hints):
+        alias = db_for_read(router, model, **hints)
+        if model._meta.app_label == 'news':
+            aliases.append(alias)
+        return alias
+
+    monkeypatch.setattr(
+        PrimaryReplicaRouter, 'db_for_read', recording_db_for_read
+    )
+    return aliases
+
+
 @pytest.fixture
 def anonymous_client():
     return Client()
@@ -46,6 +74,23 @@ def not_author_client(not_author):
     return client
 
 
+@pytest.fixture
+def staff_client(django_user_model):
+    """Фикстура для создания клиента для сотрудника."""
+    client = Client()
+    client.force_login(
+        django_user_model.objects.create(username='Редактор', is_staff=True)
+    )
+    return client
+
+
+@pytest.fixture
+def cached_author_client(author_client, home_url):
+    """Клиент автора, чьи сессия и пользователь уже лежат в кеше."""
+    author_client.get(home_url)
+    return author_client
+
+
 @pytest.fixture
 def news():
     """Фикстура для создания новости."""
@@ -82,15 +127,41 @@ def many_news():
 @pytest.fixture
 def many_comments(news, author):
     """Фикстура для создания нескольких комментариев."""
-    today = datetime.today()
-    Comment.objects.bulk_create(
-        Comment(
-            news=news.id,
+    now = timezone.now()
+    for index in range(5):
+        comment = Comment.objects.create(
+            news=news,
             author=author,
             text=f'Комментарий {index}',
-            date=today - timedelta(days=index)
         )
-        for index in range(5)
+        # created заполняется при вставке, поэтому дату меняем после:
+        # первые созданные комментарии оказываются самыми свежими.
+        comment.created = now - timedelta(days=index)
+        comment.save()
+
+
+@dataset('large_feed')
+def build_large_feed():
+    """
+    Набор для тестов на объёме: тысячи новостей, у сотни свежих
+    из них есть комментарии. Загружается фикстурой load_dataset.
+    """
+    today = datetime.today()
+    author = User.objects.create(username='Автор ленты')
+    News.objects.bulk_create(
+        News(
+            title=f'Новость {index}',
+            text='Просто текст.',
+            date=today - timedelta(days=index),
+        )
+        for index in range(LARGE_FEED_NEWS)
+    )
+    # SQLite в Django 3.2 не возвращает id из bulk_create.
+    fresh_news = News.objects.order_by('-date')[:LARGE_FEED_COMMENTED]
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in fresh_news
+        for index in range(LARGE_FEED_COMMENTS_PER_NEWS)
     )
 
 
@@ -100,12 +171,30 @@ def detail_url(news):
     return reverse('news:detail', args=(news.id,))
 
 
+@pytest.fixture
+def comments_url(news):
+    """Фикстура для получения url подгрузки комментариев."""
+    return reverse('news:comments', args=(news.id,))
+
+
 @pytest.fixture
 def home_url():
     """Фикстура для получения url главной страницы."""
     return reverse('news:home')
 
 
+@pytest.fixture
+def search_url():
+    """Фикстура для получения url поиска."""
+    return reverse('news:search')
+
+
+@pytest.fixture
+def export_url():
+    """Фикстура для получения url выгрузки архива."""
+    return reverse('news:export')
+
+
 @pytest.fixture
 def comment_delete_url(comment):
     """Фикстура для получения url удаления комментария."""
@@ -1,6 +1,14 @@
+from http import HTTPStatus
+
+import pytest
 from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
 
+from news.cache import FEED_SCOPE, bump_version, get_fragment
 from news.forms import CommentForm
+from news.models import Comment, News
+from news.search import stem
 
 
 def test_news_list_on_page_count(many_news, client, home_url):
@@ -20,13 +28,16 @@ def test_news_list_on_page_sorted(many_news, client, home_url):
     assert all_dates == sorted_dates
 
 
-def test_comment_list_on_news_page_sorted(client, news, detail_url):
+def test_comment_list_on_news_page_sorted(
+    many_comments, client, news, detail_url
+):
     """Проверка сортировки комментариев на странице новости."""
     response = client.get(detail_url)
     assert 'news' in response.context
-    news = response.context['news']
-    all_comments = news.comment_set.all()
-    all_timestamps = [comment.created for comment in all_comments]
+    comment_ids = response.context['comment_ids']
+    assert len(comment_ids) == 5
+    all_comments = Comment.objects.in_bulk(comment_ids)
+    all_timestamps = [all_comments[pk].created for pk in comment_ids]
     sorted_timestamps = sorted(all_timestamps)
     assert all_timestamps == sorted_timestamps
 
@@ -42,3 +53,225 @@ def test_authorized_client_has_form(news, author_client, detail_url):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_home_page_uses_comment_count(
+    many_news, comment, client, home_url, django_assert_num_queries
+):
+    """Главная берёт число комментариев из счётчика одним запросом."""
+    with django_assert_num_queries(1):
+        response = client.get(home_url)
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+def test_home_feed_does_not_load_text(
+    news, client, home_url, django_assert_num_queries
+):
+    """Лента выводит анонс и не загружает полный текст новостей."""
+    news.text = 'Начало новости. ' + 'Очень длинный текст. ' * 1000
+    news.save()
+    with django_assert_num_queries(1) as captured:
+        response = client.get(home_url)
+    assert '"news_news"."text"' not in captured.captured_queries[0]['sql']
+    assert news.excerpt in response.content.decode()
+
+
+def test_home_feed_served_from_cache_until_changed(
+    news, author, client, home_url, django_assert_num_queries,
+    django_capture_on_commit_callbacks
+):
+    """
+    Повторный запрос ленты не ходит в базу,
+    а новый комментарий сбрасывает закешированный фрагмент.
+    """
+    client.get(home_url)
+    with django_assert_num_queries(0):
+        response = client.get(home_url)
+    assert 'Комментариев' not in response.content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Текст')
+    response = client.get(home_url)
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+def test_home_feed_refreshed_after_bulk_update(
+    news, client, home_url, django_capture_on_commit_callbacks
+):
+    """bulk_update текста обновляет анонс и в закешированной ленте."""
+    client.get(home_url)
+    news.text = 'Совсем новый текст'
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.bulk_update([news], ['text'])
+    assert 'Совсем новый текст' in client.get(home_url).content.decode()
+
+
+def test_comment_list_shared_between_users(
+    comment, author_client, not_author_client, detail_url,
+    comment_edit_url, comment_delete_url, django_assert_num_queries
+):
+    """
+    Список комментариев собирается один раз для всех,
+    а ссылки редактирования видит только автор.
+    """
+    response = author_client.get(detail_url)
+    content = response.content.decode()
+    assert comment_edit_url in content
+    assert comment_delete_url in content
+    not_author_client.get(detail_url)
+    # Только новость и её состояние для ETag: комментарии
+    # берутся из кеша, сессия и пользователь тоже.
+    with django_assert_num_queries(2):
+        response = not_author_client.get(detail_url)
+    content = response.content.decode()
+    assert comment.text in content
+    assert comment_edit_url not in content
+    assert 'owner-controls' not in content
+
+
+def test_comment_list_shows_renamed_author(
+    comment, author, client, detail_url, django_capture_on_commit_callbacks
+):
+    """Смена имени автора сбрасывает закешированные комментарии."""
+    assert author.username in client.get(detail_url).content.decode()
+    author.username = 'Переименованный'
+    with django_capture_on_commit_callbacks(execute=True):
+        author.save()
+    assert 'Переименованный' in client.get(detail_url).content.decode()
+
+
+@pytest.mark.parametrize(
+    'backend',
+    (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.filebased.FileBasedCache',
+    )
+)
+def test_stale_fragment_served_while_rebuild_locked(
+    backend, settings, tmp_path
+):
+    """Пока другой воркер пересобирает фрагмент, отдаётся старая копия."""
+    settings.CACHES = {
+        'default': {'BACKEND': backend, 'LOCATION': str(tmp_path)}
+    }
+    assert get_fragment(FEED_SCOPE, lambda: 'старая') == 'старая'
+    bump_version(FEED_SCOPE)
+    cache.add(f'fragment-lock:{FEED_SCOPE}', 'другой воркер')
+
+    def build():
+        raise AssertionError('Фрагмент пересобирается без блокировки')
+
+    assert get_fragment(FEED_SCOPE, build) == 'старая'
+    cache.delete(f'fragment-lock:{FEED_SCOPE}')
+    assert get_fragment(FEED_SCOPE, lambda: 'новая') == 'новая'
+
+
+def test_comments_keyset_pagination(
+    author, news, client, detail_url, settings
+):
+    """Проверка, что «показать ещё» проходит все комментарии по порядку."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(5)
+    )
+    response = client.get(detail_url)
+    seen = list(response.context['comment_ids'])
+    cursor = response.context['next_cursor']
+    more_url = reverse('news:comments', args=(news.id,))
+    while cursor:
+        page = client.get(more_url, {'cursor': cursor, 'format': 'json'})
+        seen += [comment['id'] for comment in page.json()['comments']]
+        cursor = page.json()['next_cursor']
+    expected = Comment.objects.order_by('created', 'pk')
+    assert seen == list(expected.values_list('pk', flat=True))
+
+
+def test_comments_more_rejects_broken_cursor(client, news):
+    """Испорченный курсор даёт 400, а не 500."""
+    more_url = reverse('news:comments', args=(news.id,))
+    response = client.get(more_url, {'cursor': 'not-a-cursor'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.fixture
+def searchable_news():
+    """Новости для поиска в разных месяцах."""
+    return News.objects.bulk_create([
+        News(
+            title='Новости науки',
+            text='Учёные открыли новую звезду.',
+            date='2022-10-05',
+        ),
+        News(
+            title='Спорт',
+            text='Главные новости спорта и <скандалы>.',
+            date='2022-11-01',
+        ),
+        News(
+            title='Погода',
+            text='Новостей о погоде нет.',
+            date='2022-11-20',
+        ),
+        News(title='Кино', text='Премьера недели.', date='2022-11-21'),
+    ])
+
+
+def test_stem_cuts_russian_endings():
+    """Разные формы слова сводятся к одной основе."""
+    assert {stem('новостями'), stem('новостей'), stem('новости')} == {
+        'новост'
+    }
+
+
+def test_news_search_ranked_with_facets(searchable_news, client):
+    """Поиск находит все формы слова, заголовок важнее текста."""
+    response = client.get(reverse('news:search'), {'q': 'новостями'})
+    results = response.context['results']
+    assert [news.title for news in results][0] == 'Новости науки'
+    assert {news.title for news in results} == {
+        'Новости науки', 'Спорт', 'Погода'
+    }
+    snippets = {news.title: str(news.snippet) for news in results}
+    assert '&lt;скандалы&gt;' in snippets['Спорт']
+    assert [
+        (facet['month'], facet['count'])
+        for facet in response.context['facets']
+    ] == [('2022-11', 2), ('2022-10', 1)]
+
+
+def test_news_search_keyset_pagination(searchable_news, client, settings):
+    """Курсор ведёт по всем результатам без повторов, фильтр по месяцу."""
+    settings.NEWS_SEARCH_PAGE_SIZE = 1
+    search_url = reverse('news:search')
+    response = client.get(search_url, {'q': 'новость'})
+    seen = [news.pk for news in response.context['results']]
+    while response.context['next_cursor']:
+        response = client.get(search_url, {
+            'q': 'новость', 'cursor': response.context['next_cursor']
+        })
+        seen += [news.pk for news in response.context['results']]
+    assert len(seen) == len(set(seen)) == 3
+    response = client.get(search_url, {'q': 'новость', 'month': '2022-10'})
+    assert [news.title for news in response.context['results']] == [
+        'Новости науки'
+    ]
+
+
+def test_home_page_on_large_feed(load_dataset, client, home_url):
+    """Главная на тысячах новостей: свежие новости и их счётчики."""
+    load_dataset('large_feed')
+    response = client.get(home_url)
+    object_list = list(response.context['object_list'])
+    assert object_list == list(
+        News.objects.order_by('-date')[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    )
+    for news in object_list:
+        assert news.comment_count == news.comment_set.count() > 0
+
+
+@pytest.mark.parametrize('attempt', range(2))
+def test_dataset_restored_for_each_test(load_dataset, attempt):
+    """Изменения набора данных в тесте не видны следующему тесту."""
+    load_dataset('large_feed')
+    assert not News.objects.filter(title='Изменено').exists()
+    assert News.objects.update(title='Изменено') > 0
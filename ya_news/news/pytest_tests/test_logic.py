@@ -1,10 +1,27 @@
+import csv
+import gzip
+import io
+import json
+import os
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.models import Sum
 from pytest_django.asserts import assertFormError, assertRedirects
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.cache import FEED_SCOPE, get_version
+from news.forms import BAD_WORDS, WARNING, CommentForm
+from news.models import EXCERPT_WORDS, Comment, News
+from news.moderation import BadWordsMatcher
+from yacommon.auth import user_key
+from yacommon.checks import check_shared_cache
+from yacommon.imports import BatchImportCommand
+from yacommon.routers import PRIMARY_COOKIE, REPLICA_DB_ALIAS
 
 FORM_DATA = {'text': 'Новый текст', }
 
@@ -95,3 +112,505 @@ def test_other_user_cant_delete_comment(
     current_comment = Comment.objects.get(id=comment.id)
     assert current_comment.text == previous_comment.text
     assert Comment.objects.count() == previous_comment_count
+
+
+def test_comment_count_follows_create_and_delete(
+    author_client, news, detail_url, comment_delete_url, comment
+):
+    """Проверка счётчика комментариев при создании и удалении."""
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    author_client.post(detail_url, data=FORM_DATA)
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    author_client.post(comment_delete_url)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_comment_count_follows_bulk_operations(author, news):
+    """Проверка счётчика при bulk_create, QuerySet.delete и каскаде."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(5)
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 5
+    first_ids = Comment.objects.values_list('pk', flat=True)[:2]
+    Comment.objects.filter(pk__in=list(first_ids)).delete()
+    news.refresh_from_db()
+    assert news.comment_count == 3
+    author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_news_with_many_comments_deleted_in_few_queries(
+    author, news, django_assert_max_num_queries
+):
+    """Комментарии удаляемой новости удаляются одним запросом."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(1000)
+    )
+    with django_assert_max_num_queries(5):
+        news.delete()
+    assert not Comment.objects.exists()
+
+
+def test_comments_deleted_with_one_counter_update(
+    author, news, django_assert_max_num_queries
+):
+    """QuerySet.delete() пересчитывает счётчик новости один раз."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(1000)
+    )
+    with django_assert_max_num_queries(3):
+        Comment.objects.filter(news=news).delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_excerpt_follows_text(news):
+    """Анонс пересчитывается при save, bulk_create и bulk_update."""
+    long_text = ' '.join(f'слово{index}' for index in range(100))
+    news.text = long_text
+    news.save(update_fields=['text'])
+    news.refresh_from_db()
+    assert news.excerpt.split()[:EXCERPT_WORDS] == long_text.split()[
+        :EXCERPT_WORDS
+    ]
+    assert news.excerpt.endswith(' …')
+    News.objects.bulk_create([News(title='Пачкой', text='Короткий текст')])
+    created = News.objects.get(title='Пачкой')
+    assert created.excerpt == 'Короткий текст'
+    created.text = 'Новый текст'
+    News.objects.bulk_update([created], ['text'])
+    created.refresh_from_db()
+    assert created.excerpt == 'Новый текст'
+
+
+def test_seed_data_keeps_comment_counts(django_user_model):
+    """Проверка, что seed_data сохраняет пачками и не сбивает счётчики."""
+    call_command(
+        'seed_data', users=3, news=4, comments=50, batch_size=7,
+        stdout=StringIO(),
+    )
+    assert django_user_model.objects.count() == 3
+    assert News.objects.count() == 4
+    assert Comment.objects.count() == 50
+    for news in News.objects.all():
+        assert news.comment_count == news.comment_set.count()
+    assert News.objects.aggregate(total=Sum('comment_count'))['total'] == 50
+
+
+def test_export_streams_news_with_comments(
+    staff_client, export_url, many_comments, news
+):
+    """Выгрузка отдаётся потоком: за новостью идут её комментарии."""
+    other = News.objects.create(title='Без комментариев', text='Текст')
+    response = staff_client.get(export_url)
+    assert response.streaming
+    # Запросы идут при чтении тела, поэтому поток не замеряется.
+    assert 'X-Query-Count' not in response
+    assert response['Content-Type'] == 'application/x-ndjson'
+    assert 'news.ndjson' in response['Content-Disposition']
+    records = [
+        json.loads(line)
+        for line in b''.join(response.streaming_content).splitlines()
+    ]
+    assert [record['type'] for record in records] == (
+        ['news'] + ['comment'] * 5 + ['news']
+    )
+    assert records[0]['id'] == news.id
+    assert records[-1]['id'] == other.id
+    comments = records[1:6]
+    assert [comment['created'] for comment in comments] == sorted(
+        comment['created'] for comment in comments
+    )
+    assert {comment['author'] for comment in comments} == {'Автор'}
+
+
+def test_export_csv_gzip(staff_client, export_url, comment):
+    """CSV со сжатием gzip распаковывается в заголовок и строки."""
+    response = staff_client.get(export_url, {'format': 'csv', 'gzip': '1'})
+    assert response['Content-Type'] == 'application/gzip'
+    assert 'news.csv.gz' in response['Content-Disposition']
+    content = gzip.decompress(b''.join(response.streaming_content))
+    rows = list(csv.DictReader(io.StringIO(content.decode())))
+    assert [row['type'] for row in rows] == ['news', 'comment']
+    assert rows[1]['text'] == comment.text
+    assert rows[1]['news_id'] == str(comment.news_id)
+
+
+def test_export_unknown_format(staff_client, export_url):
+    """Неизвестный формат выгрузки — ошибка запроса."""
+    response = staff_client.get(export_url, {'format': 'xml'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_export_news_command(tmp_path, many_comments):
+    """Команда export_news пишет тот же архив в файл пачками."""
+    output = tmp_path / 'news.ndjson.gz'
+    stderr = StringIO()
+    call_command(
+        'export_news', gzip=True, output=str(output), batch_size=1,
+        chunk_size=2, stderr=stderr,
+    )
+    lines = gzip.decompress(output.read_bytes()).decode().splitlines()
+    assert len(lines) == 6
+    assert 'Выгружено записей: 6' in stderr.getvalue()
+
+
+def test_import_news_restores_export(tmp_path, author, many_comments, news):
+    """Выгрузка export_news загружается обратно import_news пачками."""
+    archive = tmp_path / 'news.ndjson'
+    call_command('export_news', output=str(archive), stderr=StringIO())
+    expected = list(
+        Comment.objects.values_list('id', 'news_id', 'author', 'created')
+    )
+    News.objects.all().delete()
+    stdout = StringIO()
+    call_command('import_news', str(archive), batch_size=2, stdout=stdout)
+    assert 'Принято новостей: 1, комментариев: 5' in stdout.getvalue()
+    assert list(
+        Comment.objects.values_list('id', 'news_id', 'author', 'created')
+    ) == expected
+    news.refresh_from_db()
+    assert news.comment_count == 5
+    assert news.excerpt == news.text
+
+
+def test_import_news_rejects_bad_rows_and_resumes(
+    tmp_path, author, django_user_model
+):
+    """Плохие строки отклоняются, загрузка продолжается с точки."""
+    records = (
+        {'type': 'news', 'id': 10, 'title': 'Новость', 'text': 'Текст'},
+        {
+            'type': 'comment', 'id': 1, 'news_id': 10,
+            'author': author.username, 'text': f'Ты {BAD_WORDS[0]}',
+        },
+        {
+            'type': 'comment', 'id': 2, 'news_id': 11,
+            'author': author.username, 'text': 'Нет такой новости',
+        },
+        {
+            'type': 'comment', 'id': 3, 'news_id': 10,
+            'author': 'Гость', 'text': 'Неизвестный автор',
+        },
+        {
+            'type': 'comment', 'id': 4, 'news_id': 10,
+            'author': author.username, 'text': 'Хороший комментарий',
+        },
+    )
+    archive = tmp_path / 'news.ndjson'
+    archive.write_text(
+        '\n'.join(json.dumps(record) for record in records) + '\nне json\n',
+        encoding='utf-8',
+    )
+    stderr = StringIO()
+    call_command(
+        'import_news', str(archive), batch_size=2,
+        stdout=StringIO(), stderr=stderr,
+    )
+    assert set(Comment.objects.values_list('id', flat=True)) == {4}
+    assert WARNING in stderr.getvalue()
+    rejected = [line.split(':')[0] for line in stderr.getvalue().splitlines()]
+    assert rejected == ['Строка 2', 'Строка 3', 'Строка 4', 'Строка 6']
+    assert News.objects.get(pk=10).comment_count == 1
+    # Повтор после сбоя до записи точки не создаёт дублей.
+    checkpoint = tmp_path / 'import.checkpoint'
+    checkpoint.write_text('3')
+    stdout = StringIO()
+    call_command(
+        'import_news', str(archive), checkpoint=str(checkpoint),
+        create_authors=True, stdout=stdout, stderr=StringIO(),
+    )
+    assert 'Продолжение после строки 3' in stdout.getvalue()
+    assert 'пропущено загруженных ранее: 1' in stdout.getvalue()
+    assert set(Comment.objects.values_list('id', flat=True)) == {3, 4}
+    guest = django_user_model.objects.get(username='Гость')
+    assert not guest.has_usable_password()
+    assert not checkpoint.exists()
+
+
+def test_import_news_rejects_foreign_rows_with_taken_ids(
+    tmp_path, author, news, comment
+):
+    """Занятый чужой записью id не считается загруженным ранее."""
+    records = (
+        {'type': 'news', 'id': news.pk, 'title': 'Другая', 'text': 'Текст'},
+        {
+            'type': 'comment', 'id': comment.pk + 1, 'news_id': news.pk,
+            'author': author.username, 'text': 'К чужой новости',
+        },
+        {
+            'type': 'comment', 'id': comment.pk, 'news_id': news.pk,
+            'author': author.username, 'text': 'Другой комментарий',
+        },
+    )
+    archive = tmp_path / 'news.ndjson'
+    archive.write_text(
+        '\n'.join(json.dumps(record) for record in records),
+        encoding='utf-8',
+    )
+    expected = [
+        f'Строка 1: Новость {news.pk} уже есть с другим содержимым.',
+        f'Строка 2: Новость {news.pk} не загружена.',
+        f'Строка 3: Комментарий {comment.pk} уже есть с другим содержимым.',
+    ]
+    stderr = StringIO()
+    call_command(
+        'import_news', str(archive), batch_size=1, stdout=StringIO(),
+        stderr=stderr,
+    )
+    assert stderr.getvalue().splitlines() == expected
+    # Отклонённая новость хранится в контрольной точке вместе с номером.
+    checkpoint = tmp_path / 'import.checkpoint'
+    checkpoint.write_text(f'1 {news.pk}')
+    stderr = StringIO()
+    call_command(
+        'import_news', str(archive), batch_size=1,
+        checkpoint=str(checkpoint), stdout=StringIO(), stderr=stderr,
+    )
+    assert stderr.getvalue().splitlines() == expected[1:]
+    assert list(news.comment_set.all()) == [comment]
+
+
+def test_import_news_rejects_ids_repeated_in_batch(tmp_path, author):
+    """Повтор id в одной пачке отклоняется, а не перезаписывает строку."""
+    records = (
+        {'type': 'news', 'id': 10, 'title': 'Первая', 'text': 'Текст'},
+        {'type': 'news', 'id': 10, 'title': 'Вторая', 'text': 'Текст'},
+        {
+            'type': 'comment', 'id': 1, 'news_id': 10,
+            'author': author.username, 'text': 'Первый',
+        },
+        {
+            'type': 'comment', 'id': 1, 'news_id': 10,
+            'author': author.username, 'text': 'Второй',
+        },
+    )
+    archive = tmp_path / 'news.ndjson'
+    archive.write_text(
+        '\n'.join(json.dumps(record) for record in records),
+        encoding='utf-8',
+    )
+    stdout = StringIO()
+    stderr = StringIO()
+    call_command('import_news', str(archive), stdout=stdout, stderr=stderr)
+    assert stderr.getvalue().splitlines() == [
+        'Строка 2: Новость 10 уже есть в строке 1.',
+        'Строка 4: Комментарий 1 уже есть в строке 3.',
+    ]
+    assert 'Принято новостей: 1, комментариев: 1' in stdout.getvalue()
+    assert 'отклонено строк: 2' in stdout.getvalue()
+    assert News.objects.get(pk=10).title == 'Первая'
+    assert Comment.objects.get(pk=1).text == 'Первый'
+
+
+def test_import_news_bumps_cache_after_commit(
+    news, django_capture_on_commit_callbacks
+):
+    """Версия ленты меняется только после фиксации транзакции."""
+    version = get_version(FEED_SCOPE)
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.bulk_create([News(title='Новая', text='Текст')])
+        assert get_version(FEED_SCOPE) == version
+    assert get_version(FEED_SCOPE) != version
+
+
+def test_incomplete_import_command_not_created():
+    """Команда без import_batch падает при создании, а не на первой пачке."""
+    class Command(BatchImportCommand):
+        imported = 0
+
+        def summary(self):
+            return ''
+
+        def parse_record(self, record):
+            return record
+
+    with pytest.raises(TypeError, match='import_batch'):
+        Command()
+
+
+def test_signals_bump_cache_after_commit(
+    comment, django_capture_on_commit_callbacks
+):
+    """Сохранение и удаление меняют версии только после фиксации."""
+    version = get_version(FEED_SCOPE)
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.text = 'Исправленный текст'
+        comment.save()
+        comment.delete()
+        assert get_version(FEED_SCOPE) == version
+    assert get_version(FEED_SCOPE) != version
+
+
+def test_sqlite_pragmas_applied_to_new_connections(tmp_path):
+    """Проверка, что PRAGMAS из настроек базы выполняются при соединении."""
+    wrapper = DatabaseWrapper({
+        **connection.settings_dict,
+        'NAME': tmp_path / 'db.sqlite3',
+        'PRAGMAS': {'journal_mode': 'wal', 'synchronous': 'normal'},
+    })
+    try:
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            assert cursor.fetchone() == ('wal',)
+            cursor.execute('PRAGMA synchronous')
+            assert cursor.fetchone() == (1,)
+    finally:
+        wrapper.close()
+
+
+def test_news_detail_reads_from_replica(
+    client, news, detail_url, read_aliases
+):
+    """Проверка, что страница новости с готовым фрагментом читает с реплики."""
+    client.get(detail_url)
+    read_aliases.clear()
+    client.get(detail_url)
+    assert read_aliases
+    assert set(read_aliases) == {REPLICA_DB_ALIAS}
+
+
+def test_feed_fragment_built_from_primary(
+    client, news, home_url, read_aliases
+):
+    """Проверка, что кешируемая лента собирается по основной базе."""
+    client.get(home_url)
+    assert read_aliases
+    assert set(read_aliases) == {DEFAULT_DB_ALIAS}
+
+
+def test_author_reads_primary_after_comment(
+    author_client, news, detail_url, read_aliases, settings
+):
+    """Проверка, что после записи автор читает с основной базы."""
+    response = author_client.post(detail_url, data=FORM_DATA)
+    cookie = response.cookies[PRIMARY_COOKIE]
+    assert cookie['max-age'] == settings.REPLICA_STICKY_SECONDS
+    read_aliases.clear()
+    author_client.get(detail_url)
+    assert read_aliases
+    assert set(read_aliases) == {DEFAULT_DB_ALIAS}
+
+
+@pytest.mark.parametrize(
+    'text',
+    (
+        'Обычный вежливый комментарий',
+        'РЕДИСКА!',
+        'Негодяйский поступок',
+        'редис и негодя',
+    )
+)
+def test_bad_words_matcher_matches_plain_loop(text):
+    """Скомпилированный поиск ведёт себя как прежний цикл по BAD_WORDS."""
+    expected = any(word in text.lower() for word in BAD_WORDS)
+    assert BadWordsMatcher(BAD_WORDS).search(text) == expected
+    form = CommentForm(data={'text': text})
+    assert form.is_valid() != expected
+    if expected:
+        assert form.errors['text'] == [WARNING]
+
+
+def test_bad_words_file_hot_reload(settings, tmp_path):
+    """Словарь из файла перечитывается после его изменения."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('Балбес\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    matcher = BadWordsMatcher(BAD_WORDS)
+    assert matcher.search('Ну ты и балбес')
+    assert matcher.search('Ну ты и редиска')
+    assert not matcher.search('Ну ты и лентяй')
+    words_file.write_text('лентяй\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 0))
+    assert matcher.search('Ну ты и лентяй')
+    assert not matcher.search('Ну ты и балбес')
+
+
+def test_create_comment_queries(
+    cached_author_client, news, detail_url, django_assert_num_queries
+):
+    """
+    Создание комментария: новость, INSERT комментария и UPDATE
+    счётчика. Сессия и пользователь берутся из кеша.
+    """
+    with django_assert_num_queries(3):
+        cached_author_client.post(detail_url, data=FORM_DATA)
+
+
+def test_create_invalid_comment_queries(
+    cached_author_client, news, detail_url, django_assert_num_queries
+):
+    """Ошибка формы: новость и страница комментариев."""
+    with django_assert_num_queries(2):
+        cached_author_client.post(detail_url, data={'text': BAD_WORDS[0]})
+
+
+def test_edit_comment_queries(
+    cached_author_client, comment, comment_edit_url,
+    django_assert_num_queries
+):
+    """Редактирование: комментарий с проверкой автора и UPDATE."""
+    with django_assert_num_queries(1):
+        cached_author_client.get(comment_edit_url)
+    with django_assert_num_queries(2):
+        cached_author_client.post(comment_edit_url, data=FORM_DATA)
+
+
+def test_delete_comment_queries(
+    cached_author_client, comment, comment_delete_url,
+    django_assert_num_queries
+):
+    """
+    Удаление: id и news_id комментария с проверкой автора,
+    DELETE и UPDATE счётчика.
+    """
+    with django_assert_num_queries(1):
+        cached_author_client.get(comment_delete_url)
+    with django_assert_num_queries(3):
+        cached_author_client.post(comment_delete_url)
+
+
+def test_authenticated_page_has_no_auth_queries(
+    cached_author_client, home_url, django_assert_num_queries
+):
+    """Сессия и пользователь в установившемся режиме берутся из кеша."""
+    with django_assert_num_queries(0):
+        response = cached_author_client.get(home_url)
+    assert response.context['user'].is_authenticated
+
+
+def test_cached_backend_requires_shared_cache(settings):
+    """Проверка при check --deploy не пропускает кеш пользователей в locmem."""
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    assert [error.id for error in check_shared_cache(None)] == [
+        'yacommon.E001'
+    ]
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/yanews-cache',
+    }}
+    assert check_shared_cache(None) == []
+
+
+def test_cached_user_dropped_on_save_and_logout(
+    author, cached_author_client, home_url, logout_url
+):
+    """Сохранение пользователя и выход сбрасывают его копию в кеше."""
+    assert cache.get(user_key(author.pk)) is not None
+    author.first_name = 'Иван'
+    author.save()
+    assert cache.get(user_key(author.pk)) is None
+    response = cached_author_client.get(home_url)
+    assert response.context['user'].first_name == 'Иван'
+    cached_author_client.post(logout_url)
+    assert cache.get(user_key(author.pk)) is None
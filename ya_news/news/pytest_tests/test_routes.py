@@ -1,6 +1,12 @@
+from datetime import timedelta
 from http import HTTPStatus
+from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import assertRedirects
 from pytest_lazyfixture import lazy_fixture
 
@@ -9,26 +15,34 @@ ANONYMOUS_CLIENT = lazy_fixture('anonymous_client')
 AUTHOR_CLIENT = lazy_fixture('author_client')
 NOT_AUTHOR_CLIENT = lazy_fixture('not_author_client')
 HOME_URL = lazy_fixture('home_url')
+SEARCH_URL = lazy_fixture('search_url')
 LOGIN_URL = lazy_fixture('login_url')
 LOGOUT_URL = lazy_fixture('logout_url')
 SIGNUP_URL = lazy_fixture('signup_url')
 DETAIL_URL = lazy_fixture('detail_url')
+COMMENTS_URL = lazy_fixture('comments_url')
 EDIT_URL = lazy_fixture('comment_edit_url')
 DELETE_URL = lazy_fixture('comment_delete_url')
+EXPORT_URL = lazy_fixture('export_url')
+STAFF_CLIENT = lazy_fixture('staff_client')
 
 
 @pytest.mark.parametrize(
     'url, client, expected_status',
     (
         (HOME_URL, ANONYMOUS_CLIENT, HTTPStatus.OK),
+        (SEARCH_URL, ANONYMOUS_CLIENT, HTTPStatus.OK),
         (LOGIN_URL, ANONYMOUS_CLIENT, HTTPStatus.OK),
         (LOGOUT_URL, ANONYMOUS_CLIENT, HTTPStatus.OK),
         (SIGNUP_URL, ANONYMOUS_CLIENT, HTTPStatus.OK),
         (DETAIL_URL, ANONYMOUS_CLIENT, HTTPStatus.OK),
+        (COMMENTS_URL, ANONYMOUS_CLIENT, HTTPStatus.OK),
         (EDIT_URL, AUTHOR_CLIENT, HTTPStatus.OK),
         (DELETE_URL, AUTHOR_CLIENT, HTTPStatus.OK),
         (EDIT_URL, NOT_AUTHOR_CLIENT, HTTPStatus.NOT_FOUND),
         (DELETE_URL, NOT_AUTHOR_CLIENT, HTTPStatus.NOT_FOUND),
+        (EXPORT_URL, STAFF_CLIENT, HTTPStatus.OK),
+        (EXPORT_URL, AUTHOR_CLIENT, HTTPStatus.FORBIDDEN),
     )
 )
 def test_page_status_availability(client, url, expected_status):
@@ -42,6 +56,7 @@ def test_page_status_availability(client, url, expected_status):
     (
         (EDIT_URL, ANONYMOUS_CLIENT),
         (DELETE_URL, ANONYMOUS_CLIENT),
+        (EXPORT_URL, ANONYMOUS_CLIENT),
     ),
 )
 def test_redirects(client, url, login_url):
@@ -49,3 +64,89 @@ def test_redirects(client, url, login_url):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+def test_comments_of_missing_news_not_found(client, news):
+    """Подгрузка комментариев несуществующей новости отвечает 404."""
+    url = reverse('news:comments', args=(news.id + 1,))
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_news_detail_not_modified(
+    client, news, comment, detail_url, django_assert_num_queries,
+    django_capture_on_commit_callbacks
+):
+    """Повторный запрос с ETag получает 304 за один запрос к базе."""
+    response = client.get(detail_url)
+    assert response.has_header('Last-Modified')
+    etag = response['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    comment.text = 'Исправленный текст'
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.save()
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize(
+    'change',
+    (
+        lambda news, comment: comment.save(),
+        lambda news, comment: comment.delete(),
+        lambda news, comment: news.save(),
+    ),
+    ids=('comment-edit', 'comment-delete', 'news-edit'),
+)
+def test_news_detail_modified_since_after_change(
+    client, news, comment, detail_url, change,
+    django_capture_on_commit_callbacks
+):
+    """Правка или удаление после Last-Modified дают 200, а не 304."""
+    response = client.get(detail_url)
+    last_modified = response['Last-Modified']
+    response = client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    # Last-Modified точен до секунды: изменение идёт секундой позже.
+    later = timezone.now() + timedelta(seconds=1)
+    with patch('news.cache.timezone.now', return_value=later):
+        with django_capture_on_commit_callbacks(execute=True):
+            comment.text = 'Исправленный текст'
+            news.text = 'Исправленный текст'
+            change(news, comment)
+    response = client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_news_detail_etag_varies_by_user(
+    client, author_client, not_author_client, comment, detail_url
+):
+    """Разные пользователи видят разные версии страницы новости."""
+    etags = {
+        page_client.get(detail_url)['ETag']
+        for page_client in (client, author_client, not_author_client)
+    }
+    assert len(etags) == 3
+    response = author_client.get(detail_url)
+    assert not response.has_header('Last-Modified')
+
+
+def test_home_not_modified_without_queries(
+    client, news, home_url, django_assert_num_queries
+):
+    """Главная отвечает 304 без обращений к базе."""
+    etag = client.get(home_url)['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(home_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.query_budget(3, view_name='news:detail')
+def test_query_count_headers(client, comment, detail_url):
+    """Ответ сообщает число SQL-запросов и их время."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(detail_url)
+    assert int(response['X-Query-Count']) == len(context.captured_queries)
+    assert float(response['X-Query-Time-Ms']) >= 0
@@ -0,0 +1,164 @@
+"""
+Полнотекстовый поиск по новостям.
+
+Индекс FTS5 news_news_fts создаётся миграцией 0004_news_fts
+и поддерживается триггерами на таблице news_news.
+"""
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+from .pagination import pack_cursor, unpack_cursor
+
+FTS_TABLE = 'news_news_fts'
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 15
+
+# Окончания русских слов, от длинных к коротким.
+RUSSIAN_ENDINGS = sorted(
+    (
+        'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+        'ться', 'тся', 'ешь', 'ете', 'ишь', 'ите', 'ала', 'ила', 'али',
+        'или', 'ает', 'яет', 'ует', 'ают', 'яют', 'уют',
+        'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ую',
+        'юю', 'ах', 'ях', 'ов', 'ев', 'ам', 'ям', 'ом', 'ем', 'ию', 'ью',
+        'ия', 'ья', 'ье', 'ии', 'ть', 'ет', 'ит', 'ут', 'ют', 'ат', 'ят',
+        'ла', 'ли', 'ло',
+        'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+    ),
+    key=len,
+    reverse=True,
+)
+MIN_STEM_LENGTH = 3
+
+# Сначала по одному bm25 выбирается страница лучших совпадений,
+# и только для её строк строится фрагмент текста, как в notes.search.
+# Иначе snippet мог бы считаться для каждого найденного ряда до
+# сортировки и LIMIT. Внешний MATCH нужен самому snippet: совпадения
+# просматриваются второй раз, но без разбора текста. Искать строки
+# страницы по rowid дороже: MATCH по префиксу разбирается заново
+# для каждой строки.
+SEARCH_SQL = f"""
+    WITH page AS (
+        SELECT news.id, hits.rank
+        FROM (
+            SELECT rowid, bm25({FTS_TABLE}, 5.0, 1.0) AS rank
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+        ) AS hits
+        JOIN news_news AS news ON news.id = hits.rowid
+        WHERE {{conditions}}
+        ORDER BY hits.rank, news.id
+        LIMIT %s
+    )
+    SELECT news.id, news.title, news.date, page.rank,
+           snippet({FTS_TABLE}, 1, %s, %s, '…', {SNIPPET_TOKENS})
+               AS snippet
+    FROM {FTS_TABLE}
+    CROSS JOIN page ON page.id = {FTS_TABLE}.rowid
+    CROSS JOIN news_news AS news ON news.id = page.id
+    WHERE {FTS_TABLE} MATCH %s
+    ORDER BY page.rank, news.id
+"""
+
+FACETS_SQL = f"""
+    SELECT substr(news.date, 1, 7) AS month, COUNT(*)
+    FROM {FTS_TABLE}
+    JOIN news_news AS news ON news.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s
+    GROUP BY month
+    ORDER BY month DESC
+"""
+
+
+def stem(word):
+    """
+    Отсекает окончание русского слова.
+
+    Основа ищется как префикс, поэтому «новостями» находит
+    и «новость», и «новостей».
+    """
+    for ending in RUSSIAN_ENDINGS:
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= MIN_STEM_LENGTH
+        ):
+            return word[:-len(ending)]
+    return word
+
+
+def build_match_query(query):
+    """Переводит пользовательский запрос в выражение MATCH."""
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        return None
+    return ' '.join(f'"{stem(word)}"*' for word in words)
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и выделяет найденные слова тегом <mark>."""
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+def search_news(query, cursor=None, month=None, size=None):
+    """
+    Возвращает страницу результатов поиска и курсор следующей.
+
+    Результаты упорядочены по релевантности (BM25), курсор хранит
+    релевантность и id последней показанной новости.
+    """
+    size = size or settings.NEWS_SEARCH_PAGE_SIZE
+    match = build_match_query(query)
+    if match is None or connection.vendor != 'sqlite':
+        return [], None
+    conditions = ['1']
+    params = [match]
+    if month:
+        conditions.append('substr(news.date, 1, 7) = %s')
+        params.append(month)
+    if cursor:
+        rank, pk = unpack_cursor(cursor, float, int)
+        conditions.append('(hits.rank, news.id) > (%s, %s)')
+        params += [rank, pk]
+    results = list(News.objects.raw(
+        SEARCH_SQL.format(conditions=' AND '.join(conditions)),
+        params + [size + 1, HIGHLIGHT_START, HIGHLIGHT_END, match],
+    ))
+    for news in results:
+        news.snippet = highlight(news.snippet)
+    if len(results) > size:
+        results = results[:size]
+        return results, pack_cursor(results[-1].rank, results[-1].pk)
+    return results, None
+
+
+def month_facets(query):
+    """
+    Число найденных новостей по месяцам.
+
+    Совпадения берутся из индекса, а дата — по первичному ключу,
+    без повторного просмотра таблицы новостей.
+    """
+    match = build_match_query(query)
+    if match is None or connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS_SQL, [match])
+        return [
+            {
+                'month': month,
+                'date': date(int(month[:4]), int(month[5:7]), 1),
+                'count': count,
+            }
+            for month, count in cursor.fetchall()
+        ]
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .cache import FEED_SCOPE, bump_version_on_commit, news_scope
+from .models import Comment, News, comments_removed
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, raw, **kwargs):
+    """Новый комментарий увеличивает счётчик у новости."""
+    if created and not raw:
+        News.objects.filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(pre_delete, sender=get_user_model())
+def remember_commented_news(sender, instance, **kwargs):
+    """
+    Запоминает новости, которые автор комментировал.
+
+    Каскад удаляет его комментарии одним запросом без сигналов
+    (см. Comment), поэтому счётчики пересчитываются после удаления.
+    """
+    instance._commented_news_ids = set(
+        Comment.objects.filter(author=instance).values_list(
+            'news_id', flat=True
+        ).distinct()
+    )
+
+
+@receiver(post_delete, sender=get_user_model())
+def recount_commented_news(sender, instance, using, **kwargs):
+    """Удаление автора уменьшает счётчики его новостей."""
+    comments_removed(getattr(instance, '_commented_news_ids', ()), using)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+def invalidate_feed(sender, using, **kwargs):
+    """
+    Любое изменение новостей или комментариев обновляет ленту.
+
+    Сигналы приходят внутри транзакции (админка, каскадное удаление),
+    поэтому версии здесь и ниже меняются только после её фиксации.
+    """
+    bump_version_on_commit(FEED_SCOPE, using=using)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_page(sender, instance, using, **kwargs):
+    """Изменение новости меняет версию её страницы."""
+    bump_version_on_commit(news_scope(instance.pk), using=using)
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_news_page_comments(sender, instance, using, **kwargs):
+    """
+    Изменение комментария меняет версию страницы его новости.
+
+    Удаление комментариев обновляет кеш в news.models.comments_removed.
+    """
+    bump_version_on_commit(news_scope(instance.news_id), using=using)
+
+
+@receiver(pre_save, sender=get_user_model())
+def remember_username_change(sender, instance, raw, update_fields, **kwargs):
+    """
+    Отмечает смену имени до сохранения, пока в базе старое значение.
+
+    Вход сохраняет только last_login, такие сохранения не проверяются.
+    """
+    instance._username_changed = not raw and instance.pk is not None and (
+        update_fields is None or 'username' in update_fields
+    ) and sender.objects.filter(pk=instance.pk).exclude(
+        username=instance.username
+    ).exists()
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_renamed_author_comments(sender, instance, using, **kwargs):
+    """Имя автора выводится в комментариях, смена имени обновляет страницы."""
+    if not getattr(instance, '_username_changed', False):
+        return
+    news_ids = Comment.objects.filter(author=instance).values_list(
+        'news_id', flat=True
+    ).distinct()
+    for news_id in news_ids:
+        bump_version_on_commit(news_scope(news_id), using=using)
@@ -1,14 +1,34 @@
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import (LoginRequiredMixin,
+                                        UserPassesTestMixin)
+from django.core.exceptions import BadRequest
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         JsonResponse, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from yacommon.routers import ReplicaReadMixin
+
+from .cache import FEED_SCOPE, get_fragment
+from .comments import (get_first_comments_page, render_comments,
+                       render_owner_controls)
+from .conditional import (news_detail_etag, news_detail_last_modified,
+                          news_list_etag, news_list_last_modified)
+from .export import NewsExport
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import get_comments_page
+from .search import month_facets, search_news
 
 
-class NewsList(generic.ListView):
+@method_decorator(
+    condition(news_list_etag, news_list_last_modified), name='get'
+)
+class NewsList(ReplicaReadMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
@@ -17,23 +37,78 @@ class NewsList(generic.ListView):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта. Полный текст
+        ленте не нужен: вместо него выводится сохранённый анонс.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
+        return self.model.objects.only(
+            'id', 'title', 'date', 'excerpt', 'comment_count'
         )[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
+    def get_context_data(self, **kwargs):
+        """
+        Лента одинакова для всех посетителей, поэтому берём её из кеша.
+
+        Запрос к базе выполняется только при пересборке фрагмента.
+        """
+        context = super().get_context_data(**kwargs)
+        context['feed'] = get_fragment(
+            FEED_SCOPE,
+            lambda: render_to_string(
+                'news/includes/feed.html',
+                {'object_list': context['object_list']},
+            ),
+        )
+        return context
+
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям с разбивкой по месяцам."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        try:
+            context['results'], context['next_cursor'] = search_news(
+                query,
+                cursor=self.request.GET.get('cursor'),
+                month=self.request.GET.get('month'),
+            )
+        except ValueError as error:
+            raise BadRequest(str(error)) from error
+        context['facets'] = month_facets(query)
+        context['query'] = query
+        return context
+
+
+class NewsCommentsMixin:
+    """
+    Первая страница комментариев для шаблона news/detail.html.
+
+    Список берётся из общего для всех кеша, ссылки автора
+    подставляются вторым проходом для текущего пользователя.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = get_first_comments_page(self.object.pk)
+        context['comments_html'] = render_owner_controls(
+            page['html'], self.request.user
+        )
+        context['comment_ids'] = page['comment_ids']
+        context['next_cursor'] = page['next_cursor']
+        return context
+
 
-class NewsDetail(generic.DetailView):
+@method_decorator(
+    condition(news_detail_etag, news_detail_last_modified), name='get'
+)
+class NewsDetail(ReplicaReadMixin, NewsCommentsMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,8 +117,53 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class NewsCommentsMore(generic.View):
+    """
+    Следующая страница комментариев новости.
+
+    Отдаёт HTML-фрагмент, а при ?format=json или
+    Accept: application/json — JSON.
+    """
+
+    def get(self, request, *args, **kwargs):
+        news_id = self.kwargs['pk']
+        try:
+            comments, next_cursor = get_comments_page(
+                news_id, request.GET.get('cursor')
+            )
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        # Пустая страница — повод проверить, есть ли новость вообще:
+        # обычный ответ лишнего запроса не стоит.
+        if not comments and not News.objects.filter(pk=news_id).exists():
+            raise Http404('Новость не найдена.')
+        if self.wants_json():
+            return JsonResponse({
+                'comments': [
+                    {
+                        'id': comment.pk,
+                        'author': str(comment.author),
+                        'text': comment.text,
+                        'created': comment.created.isoformat(),
+                    }
+                    for comment in comments
+                ],
+                'next_cursor': next_cursor,
+            })
+        return HttpResponse(render_owner_controls(
+            render_comments(news_id, comments, next_cursor), request.user
+        ))
+
+    def wants_json(self):
+        return (
+            self.request.GET.get('format') == 'json'
+            or 'application/json' in self.request.headers.get('Accept', '')
+        )
+
+
 class NewsComment(
         LoginRequiredMixin,
+        NewsCommentsMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -63,8 +183,9 @@ class NewsComment(
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,9 +204,9 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Новость берём по news_id уже загруженного комментария."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -98,7 +219,53 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def get_queryset(self):
+        """Заголовок новости нужен шаблону, загружаем его тем же запросом."""
+        return super().get_queryset().select_related('news')
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def get_queryset(self):
+        """
+        Для удаления достаточно id и news_id.
+
+        news_id нужен сигналу счётчика и редиректу, а проверка
+        владельца остаётся в WHERE того же запроса.
+        """
+        queryset = super().get_queryset()
+        if self.request.method == 'POST':
+            return queryset.only('id', 'news_id')
+        return queryset.select_related('news')
+
+
+class NewsArchiveExport(UserPassesTestMixin, generic.View):
+    """
+    Выгрузка архива новостей с комментариями, только для персонала.
+
+    ?format=ndjson (по умолчанию) или csv, ?gzip=1 сжимает поток.
+    Ответ отдаётся по мере чтения базы, см. news.export.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        try:
+            export = NewsExport(
+                request.GET.get('format', 'ndjson'),
+                request.GET.get('gzip') == '1',
+                settings.EXPORT_NEWS_BATCH_SIZE,
+                settings.EXPORT_COMMENTS_CHUNK_SIZE,
+            )
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        response = StreamingHttpResponse(
+            export, content_type=export.content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export.filename}"'
+        )
+        return response
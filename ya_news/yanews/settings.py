@@ -1,9 +1,14 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий для YaNews и YaNote пакет yacommon лежит в корне репозитория.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
 DEBUG = True
@@ -18,9 +23,12 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'news.apps.NewsConfig',
+    'yacommon',
 ]
 
 MIDDLEWARE = [
+    'yacommon.middleware.QueryCountMiddleware',
+    'yacommon.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,10 +63,57 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # По умолчанию реплика — тот же файл. Отдельная копия с ручной
+    # синхронизацией настроена в settings_replica.py.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['yacommon.routers.PrimaryReplicaRouter']
+
+# Приложения, чьи модели представления могут читать с реплики.
+REPLICA_APP_LABELS = ('news',)
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_STICKY_SECONDS = 15
+
+# locmem у каждого процесса свой: годится для разработки и тестов,
+# где воркер один. Боевой общий кеш настраивается в settings_prod.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yacommon.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+
+# Сессия и пользователь берутся из кеша, база нужна только при промахе.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedModelBackend']
+
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
 AUTH_PASSWORD_VALIDATORS = []
 
 
@@ -80,3 +135,30 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+NEWS_SEARCH_PAGE_SIZE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 20
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+FRAGMENT_CACHE_LOCK_TIMEOUT = 30
+
+# Выгрузка архива: новостей в одной пачке и строк комментариев,
+# которые iterator() забирает из базы за раз.
+EXPORT_NEWS_BATCH_SIZE = 500
+EXPORT_COMMENTS_CHUNK_SIZE = 2000
+# Загрузка архива: строк NDJSON в одной транзакции.
+IMPORT_NEWS_BATCH_SIZE = 1000
+
+# Файл с дополнительными запрещёнными словами, по одному на строку.
+BAD_WORDS_FILE = None
+
+# Допустимое число SQL-запросов на один HTTP-запрос по имени маршрута.
+QUERY_BUDGETS = {
+    'news:home': 1,
+    'news:search': 2,
+    'news:comments': 2,
+    'news:detail': 5,
+    'news:edit': 4,
+    'news:delete': 5,
+}
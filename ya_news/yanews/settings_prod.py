@@ -0,0 +1,38 @@
+from .settings import *  # noqa: F401, F403
+from .settings import BASE_DIR, DATABASES
+
+DEBUG = False
+
+# SQLite в боевом режиме: журнал WAL позволяет читать во время записи,
+# а busy_timeout заставляет писателей ждать блокировку, а не падать
+# с «database is locked». Соединение живёт между запросами.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+DATABASES = {
+    alias: {**database, 'CONN_MAX_AGE': 600, 'PRAGMAS': SQLITE_PRAGMAS}
+    for alias, database in DATABASES.items()
+}
+
+# Версии фрагментов, отметки изменений для ETag, сессии и копии
+# пользователей должны быть общими для всех воркеров: с locmem
+# bump_version сбросил бы кеш только в своём процессе, а остальные
+# отдавали бы старую ленту до FRAGMENT_CACHE_TIMEOUT. Файловый кеш
+# общий для воркеров одной машины; если машин несколько, нужен
+# memcached (PyMemcacheCache) с тем же LOCATION у всех.
+# Блокировка пересборки фрагментов (news.cache.get_fragment) на файловом
+# кеше лишь снижает число одновременных пересборок: add там не атомарен
+# между процессами. Строгую блокировку даёт memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    }
+}
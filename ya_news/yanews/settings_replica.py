@@ -0,0 +1,12 @@
+from .settings import *  # noqa: F401, F403
+from .settings import BASE_DIR, DATABASES
+
+# Реплика в отдельном файле. Репликацию заменяет команда sync_replica,
+# которая копирует основную базу поверх реплики.
+DATABASES = {
+    **DATABASES,
+    'replica': {
+        **DATABASES['replica'],
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+    },
+}
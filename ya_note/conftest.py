@@ -0,0 +1,8 @@
+# Плагины подключаются из conftest в корне проекта: pytest читает его
+# до разбора параметров командной строки и до conftest тестов.
+pytest_plugins = (
+    'yacommon.testing.fixtures',
+    'yacommon.testing.profiling',
+    'yacommon.testing.query_budget',
+    'yacommon.testing.snapshots',
+)
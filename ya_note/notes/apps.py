@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+from yacommon.db import create_fts_without_migrations
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+    # Индекс FTS5 и миграция с его SQL, см. create_fts_without_migrations.
+    fts_table = 'notes_note_fts'
+    fts_migration = 'notes.migrations.0005_note_fts_contentful'
+
+    def ready(self):
+        from . import db, signals  # noqa: F401
+
+        post_migrate.connect(create_fts_without_migrations, sender=self)
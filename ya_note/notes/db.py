@@ -0,0 +1,20 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .fields import decompress_text
+
+
+@receiver(connection_created)
+def register_sqlite_functions(sender, connection, **kwargs):
+    """
+    Регистрирует SQL-функцию notes_text, распаковывающую текст заметки.
+
+    Индекс и его триггеры с миграции 0005_note_fts_contentful без неё
+    обходятся, функция нужна запросам, которые сравнивают сам текст,
+    и миграции 0004_note_text_compressed.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    connection.connection.create_function(
+        'notes_text', 1, decompress_text, deterministic=True
+    )
@@ -0,0 +1,79 @@
+"""
+Поле для длинного текста, который хранится в базе сжатым.
+
+Значение в базе — BLOB, первый байт которого задаёт формат:
+FORMAT_PLAIN — текст в UTF-8 как есть, FORMAT_ZLIB — текст, сжатый zlib.
+Сжимаются только тексты длиннее COMPRESS_THRESHOLD байт и только если
+это экономит место. По байту формата позже можно добавить другой
+алгоритм, не переписывая старые строки.
+
+Сравнение в базе работает только на точное совпадение: contains,
+startswith и прочие шаблоны сравнивали бы образец со сжатыми байтами
+и молча ничего не находили, поэтому такие lookup отклоняются
+с FieldError. Искать по тексту нужно через полнотекстовый индекс,
+см. notes.search.
+"""
+import zlib
+
+from django.core.exceptions import FieldError
+from django.db import models
+
+FORMAT_PLAIN = 0
+FORMAT_ZLIB = 1
+COMPRESS_THRESHOLD = 1024
+COMPRESS_LEVEL = 6
+
+# Lookup, которые сравнивают значение в базе целиком.
+SUPPORTED_LOOKUPS = frozenset(('exact', 'in', 'isnull'))
+
+
+def compress_text(text):
+    """Значение для базы: байт формата и текст, сжатый при выгоде."""
+    data = text.encode()
+    if len(data) > COMPRESS_THRESHOLD:
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        if len(compressed) < len(data):
+            return bytes((FORMAT_ZLIB,)) + compressed
+    return bytes((FORMAT_PLAIN,)) + data
+
+
+def decompress_text(value):
+    """
+    Текст из значения в базе.
+
+    Строки, записанные до перехода на сжатие, приходят из базы
+    обычным текстом и возвращаются как есть.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    kind, data = value[0], value[1:]
+    if kind == FORMAT_ZLIB:
+        data = zlib.decompress(data)
+    elif kind != FORMAT_PLAIN:
+        raise ValueError(f'Неизвестный формат сжатого текста: {kind}')
+    return data.decode()
+
+
+class CompressedTextField(models.TextField):
+    """TextField, который хранит текст в BLOB, см. compress_text."""
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def get_lookup(self, lookup_name):
+        if lookup_name not in SUPPORTED_LOOKUPS:
+            raise FieldError(
+                f'Поле {self.name} хранится сжатым и не поддерживает '
+                f'lookup {lookup_name!r}: ищите через notes.search.'
+            )
+        return super().get_lookup(lookup_name)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return None
+        return connection.Database.Binary(compress_text(value))
+
+    def from_db_value(self, value, expression, connection):
+        return decompress_text(value)
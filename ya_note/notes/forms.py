@@ -1,6 +1,4 @@
 from django import forms
-from django.core.exceptions import ValidationError
-from pytils.translit import slugify
 
 from .models import Note
 
@@ -14,15 +12,12 @@ class NoteForm(forms.ModelForm):
         model = Note
         fields = ('title', 'text', 'slug')
 
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+    def clean(self):
+        """
+        Уникальность slug не проверяем запросом заранее.
+
+        ModelForm.clean() намеренно не вызывается: его проверка
+        уникальности стоит лишнего запроса и не защищает от гонки.
+        Занятый slug ловит индекс в базе при сохранении, см. NoteFormMixin.
+        """
+        return self.cleaned_data
@@ -0,0 +1,99 @@
+"""
+Полнотекстовый индекс заметок notes_note_fts.
+
+Текст заметок хранится в базе сжатым (notes.fields), и SQLite сам
+его не распакует: функцию notes_text регистрирует только Django.
+Поэтому индекс держит свою копию заголовка и несжатого текста,
+а триггеры на notes_note, созданные миграцией 0005_note_fts_contentful,
+обходятся без неё. Они сами добавляют в индекс новую заметку
+с пустым текстом, переносят изменения title и author_id и удаляют
+строку вместе с заметкой, так что вставка, правка и удаление работают
+из любого клиента SQLite. Текст в индекс записывает Django:
+Note.save через сигнал post_save, а NoteQuerySet.bulk_create
+и update — сами. Текст, изменённый в обход Django, попадёт в поиск
+после rebuild_notes_index или reindex_texts.
+"""
+from itertools import islice
+
+from django.db import connections
+
+from .fields import decompress_text
+
+FTS_TABLE = 'notes_note_fts'
+REINDEX_BATCH_SIZE = 500
+
+
+def index_texts(texts, using):
+    """Записывает в индекс несжатые тексты: пары (id заметки, текст)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {FTS_TABLE} SET text = %s WHERE rowid = %s',
+            [(text, pk) for pk, text in texts],
+        )
+
+
+def index_texts_by_slug(notes, using):
+    """
+    Записывает в индекс тексты заметок, найденных по slug.
+
+    Нужна после bulk_create: SQLite не возвращает id вставленных строк.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {FTS_TABLE} SET text = %s WHERE rowid = '
+            '(SELECT id FROM notes_note WHERE slug = %s)',
+            [(note.text, note.slug) for note in notes],
+        )
+
+
+def reindex_texts(ids, using):
+    """Перечитывает из базы и индексирует тексты заметок с id из ids."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    ids = iter(ids)
+    with connection.cursor() as cursor:
+        while chunk := list(islice(ids, REINDEX_BATCH_SIZE)):
+            cursor.execute(
+                'SELECT id, text FROM notes_note WHERE id IN '
+                f'({", ".join(["%s"] * len(chunk))})',
+                chunk,
+            )
+            index_texts(
+                [
+                    (pk, decompress_text(text))
+                    for pk, text in cursor.fetchall()
+                ],
+                using,
+            )
+
+
+def rebuild_index(connection):
+    """Заполняет индекс заново по всем заметкам, пачками по id."""
+    last_id = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        while True:
+            cursor.execute(
+                'SELECT id, title, text, author_id FROM notes_note '
+                'WHERE id > %s ORDER BY id LIMIT %s',
+                (last_id, REINDEX_BATCH_SIZE),
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE}(rowid, title, text, author_id) '
+                'VALUES (%s, %s, %s, %s)',
+                [
+                    (pk, title, decompress_text(text), author_id)
+                    for pk, title, text, author_id in rows
+                ],
+            )
+            last_id = rows[-1][0]
@@ -0,0 +1,103 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, Func, Q, TextField
+
+from notes.models import Note
+from notes.search import search_notes
+from yacommon.benchmarks import percentile
+
+User = get_user_model()
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+BENCH_USERNAME = 'bench-search'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по индексу FTS5 и LIKE на синтетических '
+        'заметках одного пользователя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Не удалять синтетические заметки после замера.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 10)))
+            for _ in range(20000)
+        ]
+        author, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        started = time.perf_counter()
+        self.create_notes(author, vocabulary, rng, options)
+        self.stdout.write(
+            f'Создано заметок: {options["notes"]} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
+        words = rng.sample(vocabulary, options['queries'])
+        fts = self.measure(lambda word: search_notes(author, word, 50), words)
+        # Сжатый text сравнивается с образцом после распаковки
+        # SQL-функцией notes_text, см. notes.db.
+        plain_text = Func(
+            F('text'), function='notes_text', output_field=TextField()
+        )
+        like = self.measure(
+            lambda word: list(
+                Note.objects.filter(author=author).alias(
+                    plain_text=plain_text
+                ).filter(
+                    Q(title__contains=word) | Q(plain_text__contains=word)
+                ).only('id', 'title', 'slug')[:50]
+            ),
+            words,
+        )
+        for name, timings in (('FTS5', fts), ('LIKE', like)):
+            self.stdout.write(
+                f'{name}: p50 {percentile(timings, 50):.2f} мс, '
+                f'p95 {percentile(timings, 95):.2f} мс, '
+                f'среднее {statistics.mean(timings):.2f} мс'
+            )
+        if not options['keep']:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM notes_note WHERE author_id = %s', [author.pk]
+                )
+            author.delete()
+
+    def create_notes(self, author, vocabulary, rng, options):
+        run = uuid.uuid4().hex[:8]
+        batch_size = options['batch_size']
+        for start in range(0, options['notes'], batch_size):
+            stop = min(start + batch_size, options['notes'])
+            with transaction.atomic():
+                Note.objects.bulk_create(
+                    Note(
+                        title=' '.join(rng.choices(vocabulary, k=4)),
+                        text=' '.join(rng.choices(vocabulary, k=60)),
+                        slug=f'bench-{run}-{index}',
+                        author=author,
+                    )
+                    for index in range(start, stop)
+                )
+
+    def measure(self, search, words):
+        timings = []
+        for word in words:
+            started = time.perf_counter()
+            search(word)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
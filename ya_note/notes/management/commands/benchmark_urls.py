@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.urls import reverse
+
+from notes import urls
+from notes.models import Note
+from yacommon.benchmarks import UrlBenchmarkCommand
+
+User = get_user_model()
+
+
+class Command(UrlBenchmarkCommand):
+    help = (
+        'Замеряет p50/p95/p99 времени ответа и число SQL-запросов '
+        'для каждого именованного адреса notes.urls.'
+    )
+    project = 'ya_note'
+    urls = urls
+
+    def prepare(self):
+        # Пользователь с наибольшим числом заметок — худший случай
+        # для списка и поиска.
+        author = User.objects.annotate(
+            notes_count=Count('note')
+        ).filter(notes_count__gt=0).order_by('-notes_count').first()
+        if author is None:
+            raise CommandError('Заметок нет, сначала запустите seed_data.')
+        note = Note.objects.filter(author=author).order_by('pk').first()
+        query = note.title.split()[0]
+        return author, {
+            'notes:home': (reverse('notes:home'), {}),
+            'notes:add': (reverse('notes:add'), {}),
+            'notes:edit': (reverse('notes:edit', args=(note.slug,)), {}),
+            'notes:detail': (reverse('notes:detail', args=(note.slug,)), {}),
+            'notes:delete': (reverse('notes:delete', args=(note.slug,)), {}),
+            'notes:list': (reverse('notes:list'), {}),
+            'notes:search': (reverse('notes:search'), {'q': query}),
+            'notes:success': (reverse('notes:success'), {}),
+        }
+
+    def count_rows(self):
+        return {'notes': Note.objects.count()}
@@ -0,0 +1,71 @@
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает заметки в JSON Lines потоком: заметки читаются '
+        'пачками по id, поэтому память не зависит от размера таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для выгрузки, «-» — стандартный вывод.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EXPORT_NOTES_BATCH_SIZE,
+            help='Сколько заметок читать за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        started = time.perf_counter()
+        rows = 0
+        with self.open_output(options['output']) as file:
+            for note in self.notes(options['batch_size']):
+                file.write(json.dumps(note, ensure_ascii=False) + '\n')
+                rows += 1
+        elapsed = time.perf_counter() - started
+        # Отчёт идёт в stderr, чтобы не смешаться с выгрузкой в stdout.
+        self.stderr.write(
+            f'Выгружено заметок: {rows} за {elapsed:.1f} с '
+            f'({rows / max(elapsed, 1e-9):.0f} строк/с)',
+            style_func=self.style.SUCCESS,
+        )
+
+    def open_output(self, path):
+        if path == '-':
+            return nullcontext(sys.stdout)
+        return open(path, 'w', encoding='utf-8')
+
+    def notes(self, batch_size):
+        """Записи выгрузки пачками по batch_size в порядке id."""
+        last_id = 0
+        while True:
+            batch = list(
+                Note.objects.filter(pk__gt=last_id).order_by('pk').values(
+                    'id', 'title', 'text', 'slug', 'author__username'
+                )[:batch_size]
+            )
+            if not batch:
+                return
+            for note in batch:
+                yield {
+                    'title': note['title'],
+                    'text': note['text'],
+                    'slug': note['slug'],
+                    'author': note['author__username'],
+                }
+            last_id = batch[-1]['id']
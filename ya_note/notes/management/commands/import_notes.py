@@ -0,0 +1,63 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from pytils.translit import slugify
+
+from notes.models import Note
+from notes.slugs import bulk_create_with_unique_slugs
+from yacommon.imports import BatchImportCommand
+
+NOTE_FIELDS = ('title', 'text', 'slug')
+
+
+class Command(BatchImportCommand):
+    help = (
+        'Загружает заметки из JSON Lines в формате export_notes пачками, '
+        'каждая пачка — в своей транзакции. Занятые slug получают '
+        'суффикс, как при сохранении заметки с сайта.'
+    )
+    batch_size_setting = 'IMPORT_NOTES_BATCH_SIZE'
+
+    def start(self, options):
+        self.created = 0
+        return 0
+
+    @property
+    def imported(self):
+        return self.created
+
+    def summary(self):
+        return f'Создано заметок: {self.created}'
+
+    def parse_record(self, record):
+        """Имя автора и заметка без автора."""
+        if not isinstance(record.get('author'), str):
+            raise ValidationError('Нет имени автора.')
+        return record['author'], self.build(record)
+
+    def import_batch(self, batch):
+        self.save_batch(self.parse_batch(batch))
+
+    def build(self, record):
+        note = Note(**{
+            field: record[field] for field in NOTE_FIELDS if field in record
+        })
+        note.full_clean(exclude=('author',), validate_unique=False)
+        if not note.slug:
+            # Та же основа, что и в Note.save.
+            max_length = Note._meta.get_field('slug').max_length
+            note.slug = slugify(note.title)[:max_length]
+        return note
+
+    @transaction.atomic
+    def save_batch(self, notes):
+        """Сохраняет пачку в одной транзакции."""
+        self.resolve_authors({author for _, (author, _) in notes})
+        accepted = []
+        for number, (author, note) in notes:
+            if author not in self.authors:
+                self.reject(number, f'Неизвестный автор {author!r}.')
+            else:
+                note.author_id = self.authors[author]
+                accepted.append(note)
+        bulk_create_with_unique_slugs(Note, accepted)
+        self.created += len(accepted)
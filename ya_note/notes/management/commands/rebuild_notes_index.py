@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from notes.fts import FTS_TABLE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс заметок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='После перестроения слить сегменты индекса в один.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Индекс FTS5 доступен только для SQLite.')
+        # Индекс хранит свою копию текста, поэтому 'rebuild' самого
+        # FTS5 не увидел бы правок в обход Django: текст перечитывается.
+        with transaction.atomic():
+            rebuild_index(connection)
+        if options['optimize']:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) "
+                    "VALUES ('optimize')"
+                )
+        self.stdout.write(self.style.SUCCESS('Индекс заметок перестроен.'))
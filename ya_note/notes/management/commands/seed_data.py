@@ -0,0 +1,27 @@
+from notes.models import Note
+from yacommon.seeding import SeedCommand
+
+
+class Command(SeedCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями и заметками '
+        'для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--notes', type=int, default=100_000)
+
+    def seed_models(self, run, user_ids, options):
+        self.seed('заметок', Note, self.notes(run, user_ids, options['notes']))
+
+    def notes(self, run, user_ids, count):
+        # bulk_create не вызывает Note.save, поэтому адрес задаём сами:
+        # метка запуска делает его уникальным без запросов к базе.
+        for index in range(count):
+            yield Note(
+                title=self.words(self.rng.randint(2, 6)).capitalize(),
+                text=self.words(self.rng.randint(20, 150)),
+                slug=f'seed-{run}-{index}',
+                author_id=self.rng.choice(user_ids),
+            )
@@ -0,0 +1,137 @@
+"""
+Сжатие текста заметок и индекс FTS5 поверх сжатого столбца.
+
+Представление notes_note_fts_content и триггеры индекса распаковывают
+text SQL-функцией notes_text. SQLite хранит в схеме только её имя,
+а саму функцию регистрирует Django на каждом своём соединении
+(notes.db.register_sqlite_functions). Поэтому вставка и удаление
+заметок, а также изменение title, text и author_id вне Django — из
+sqlite3, dbshell или сторонних инструментов — падают с ошибкой
+«no such function: notes_text». Изменение других столбцов триггер
+не задевает и работает откуда угодно, чтение notes_note и резервное
+копирование (.backup, VACUUM INTO) функцию тоже не вызывают.
+Миграция 0005_note_fts_contentful заменяет этот индекс индексом
+без notes_text в триггерах.
+"""
+from importlib import import_module
+
+from django.db import migrations
+
+import notes.fields
+from notes.fields import compress_text, decompress_text
+
+BATCH_SIZE = 500
+
+# Индекс из 0003 читает text прямо из notes_note. Сжатый текст индексу
+# отдаёт представление через SQL-функцию notes_text (см. notes.db),
+# а триггеры распаковывают новые и старые значения той же функцией.
+CREATE_SQL = (
+    """
+    CREATE VIEW notes_note_fts_content AS
+    SELECT id, title, notes_text(text) AS text, author_id
+    FROM notes_note
+    """,
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, author_id,
+        content='notes_note_fts_content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, notes_text(new.text), new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        )
+        VALUES (
+            'delete', old.id, old.title, notes_text(old.text), old.author_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        )
+        VALUES (
+            'delete', old.id, old.title, notes_text(old.text), old.author_id
+        );
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, notes_text(new.text), new.author_id);
+    END
+    """,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+    'DROP VIEW IF EXISTS notes_note_fts_content',
+)
+
+plain_fts = import_module('notes.migrations.0003_note_fts')
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        # Полнотекстовый индекс FTS5 есть только в SQLite.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def rewrite_texts(convert):
+    """Переписывает text всех заметок пачками по BATCH_SIZE."""
+    def run(apps, schema_editor):
+        last_id = 0
+        with schema_editor.connection.cursor() as cursor:
+            while True:
+                cursor.execute(
+                    'SELECT id, text FROM notes_note WHERE id > %s '
+                    'ORDER BY id LIMIT %s',
+                    (last_id, BATCH_SIZE),
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    return
+                cursor.executemany(
+                    'UPDATE notes_note SET text = %s WHERE id = %s',
+                    [(convert(decompress_text(text)), pk) for pk, text in rows],
+                )
+                last_id = rows[-1][0]
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_fts'),
+    ]
+
+    operations = [
+        # Пересоздание таблицы при смене типа столбца удалило бы
+        # триггеры, поэтому индекс снимается до него и строится заново.
+        migrations.RunPython(
+            run_sqlite(plain_fts.DROP_SQL), run_sqlite(plain_fts.CREATE_SQL)
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(
+                help_text='Добавьте подробностей', verbose_name='Текст'
+            ),
+        ),
+        migrations.RunPython(rewrite_texts(compress_text), rewrite_texts(str)),
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,81 @@
+"""
+Индекс FTS5 со своей копией текста, без SQL-функции в триггерах.
+
+Индекс из 0004 читал сжатый text через функцию notes_text, которую
+регистрирует только Django, и вставка, удаление и правка заметок
+из sqlite3 или других клиентов падали. Теперь индекс хранит несжатый
+текст сам, триггеры обходятся без notes_text, а текст в индекс
+записывает Django, см. notes.fts.
+"""
+from importlib import import_module
+
+from django.db import migrations
+
+from notes.fts import rebuild_index
+
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, author_id,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    # Текст новой заметки дописывает Django: SQLite его не распакует.
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, '', new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        DELETE FROM notes_note_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update
+    AFTER UPDATE OF title, author_id ON notes_note BEGIN
+        UPDATE notes_note_fts
+        SET title = new.title, author_id = new.author_id
+        WHERE rowid = new.id;
+    END
+    """,
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+compressed_fts = import_module('notes.migrations.0004_note_text_compressed')
+
+
+def run_sqlite(statements, fill=False):
+    def run(apps, schema_editor):
+        # Полнотекстовый индекс FTS5 есть только в SQLite.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+        if fill:
+            rebuild_index(schema_editor.connection)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_text_compressed'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_sqlite(compressed_fts.DROP_SQL),
+            run_sqlite(compressed_fts.CREATE_SQL),
+        ),
+        migrations.RunPython(
+            run_sqlite(CREATE_SQL, fill=True), run_sqlite(DROP_SQL)
+        ),
+    ]
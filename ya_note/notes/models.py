@@ -1,7 +1,49 @@
+from itertools import islice
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from pytils.translit import slugify
 
+from .fields import CompressedTextField
+from .fts import REINDEX_BATCH_SIZE, index_texts_by_slug, reindex_texts
+from .slugs import save_with_unique_slug
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, ignore_conflicts=False, **kwargs):
+        """
+        bulk_create не вызывает save() и не отправляет сигналы,
+        поэтому текст новых заметок записываем в индекс здесь же.
+
+        SQLite не возвращает id, и заметки находятся по уникальному
+        slug. С ignore_conflicts часть строк могла не вставиться,
+        тогда тексты перечитываются из базы.
+        """
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(
+                objs, *args, ignore_conflicts=ignore_conflicts, **kwargs
+            )
+            if not ignore_conflicts:
+                index_texts_by_slug(objs, self.db)
+                return objs
+            slugs = iter([note.slug for note in objs])
+            while chunk := list(islice(slugs, REINDEX_BATCH_SIZE)):
+                reindex_texts(self.model.objects.using(self.db).filter(
+                    slug__in=chunk
+                ).values_list('pk', flat=True), self.db)
+        return objs
+
+    def update(self, **kwargs):
+        """Изменённый текст перечитывается в индекс после обновления."""
+        if 'text' not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            reindex_texts(ids, self.db)
+        return rows
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -10,7 +52,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -27,11 +69,21 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'id'), name='note_author_id_idx'
+            ),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        self.slug = slugify(self.title)[:max_slug_length]
+        return save_with_unique_slug(self, super().save, *args, **kwargs)
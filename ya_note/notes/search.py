@@ -0,0 +1,77 @@
+"""
+Полнотекстовый поиск по заметкам пользователя.
+
+Индекс FTS5 notes_note_fts создаётся миграцией 0005_note_fts_contentful
+и хранит несжатую копию текста заметок, см. notes.fts.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .fts import FTS_TABLE
+from .models import Note
+
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 12
+
+RANK = f'bm25({FTS_TABLE}, 10.0, 1.0, 0.0)'
+
+# Фрагмент текста строится только для лучших совпадений из подзапроса:
+# иначе SQLite распаковал бы и разобрал текст каждой найденной заметки
+# до сортировки.
+SEARCH_SQL = f"""
+    SELECT note.id, note.title, note.slug,
+           snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS})
+               AS snippet,
+           {RANK} AS rank
+    FROM {FTS_TABLE}
+    JOIN notes_note AS note ON note.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND note.author_id = %s
+      AND {FTS_TABLE}.rowid IN (
+          SELECT rowid FROM {FTS_TABLE}
+          WHERE {FTS_TABLE} MATCH %s
+          ORDER BY {RANK}
+          LIMIT %s
+      )
+    ORDER BY rank
+"""
+
+
+def build_match_query(author_id, query):
+    """
+    Переводит пользовательский запрос в выражение MATCH.
+
+    Каждое слово ищется как префикс, чтобы поиск работал по мере
+    набора. Условие на автора проверяется внутри индекса.
+    """
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"*' for word in words)
+    return f'author_id : {int(author_id)} AND {{title text}} : ({terms})'
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и выделяет найденные слова тегом <mark>."""
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+def search_notes(author, query, limit):
+    """Заметки автора по запросу, лучшие совпадения (BM25) первыми."""
+    match = build_match_query(author.pk, query)
+    if match is None or connection.vendor != 'sqlite':
+        return []
+    notes = list(Note.objects.raw(
+        SEARCH_SQL,
+        (HIGHLIGHT_START, HIGHLIGHT_END, match, author.pk, match, limit),
+    ))
+    for note in notes:
+        note.snippet = highlight(note.snippet)
+    return notes
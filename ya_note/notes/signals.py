@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .fts import index_texts
+from .models import Note
+
+
+@receiver(post_save, sender=Note)
+def index_note_text(sender, instance, using, update_fields, **kwargs):
+    """
+    Записывает текст сохранённой заметки в полнотекстовый индекс.
+
+    Триггер добавляет в индекс новую заметку с пустым текстом:
+    распаковать сжатый text может только Django.
+    """
+    if update_fields is None or 'text' in update_fields:
+        index_texts([(instance.pk, instance.text)], using)
@@ -0,0 +1,133 @@
+"""
+Выделение уникальных slug для заметок.
+
+Уникальность обеспечивает индекс на поле slug: сначала пробуем
+сохранить заметку как есть и только при IntegrityError подбираем
+свободный вариант с суффиксом (-2, -3, ...).
+
+Для массовой загрузки slug подбираются сразу на всю пачку
+одним запросом slug__in, см. bulk_create_with_unique_slugs.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+
+SUFFIX_WINDOW = 20
+MAX_ATTEMPTS = 5
+
+
+def slug_candidates(base, max_length, start, stop):
+    """Варианты base, base-2, base-3... с учётом максимальной длины."""
+    for number in range(start, stop):
+        suffix = f'-{number}' if number > 1 else ''
+        yield base[:max_length - len(suffix)] + suffix
+
+
+def slug_is_taken(model, slug, exclude_pk=None):
+    queryset = model.objects.filter(slug=slug)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset.exists()
+
+
+def find_free_slug(model, base, exclude_pk=None):
+    """
+    Первый свободный вариант slug.
+
+    Кандидаты проверяются окнами по SUFFIX_WINDOW штук,
+    по одному запросу slug__in на окно.
+    """
+    max_length = model._meta.get_field('slug').max_length
+    start = 1
+    while True:
+        window = list(slug_candidates(
+            base, max_length, start, start + SUFFIX_WINDOW
+        ))
+        taken = model.objects.filter(slug__in=window)
+        if exclude_pk is not None:
+            taken = taken.exclude(pk=exclude_pk)
+        taken = set(taken.values_list('slug', flat=True))
+        for slug in window:
+            if slug not in taken:
+                return slug
+        start += SUFFIX_WINDOW
+
+
+def save_with_unique_slug(instance, save, *args, **kwargs):
+    """
+    Сохраняет объект, подбирая свободный slug при конфликте.
+
+    В обычном случае это ровно один INSERT или UPDATE без
+    предварительных проверок.
+    """
+    base = instance.slug
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            slug = find_free_slug(type(instance), base, instance.pk)
+            if slug == instance.slug:
+                # Конфликт был не по slug.
+                raise
+            instance.slug = slug
+    return save(*args, **kwargs)
+
+
+def unique_slugs(model, bases):
+    """
+    Свободные slug для пачки новых объектов с основами bases.
+
+    Для каждой основы проверяется на один вариант больше, чем объектов
+    с ней в пачке, все варианты — одним запросом slug__in. Следующее
+    окно в SUFFIX_WINDOW вариантов запрашивается только для основ,
+    которым свободных не хватило.
+    """
+    max_length = model._meta.get_field('slug').max_length
+    needed = Counter(bases)
+    start = dict.fromkeys(needed, 1)
+    free = {base: [] for base in needed}
+    # Варианты разных основ могут совпасть: «a-2» и «a» с суффиксом.
+    used = set()
+    window_size = {base: count + 1 for base, count in needed.items()}
+    while needed:
+        windows = {
+            base: list(slug_candidates(
+                base, max_length, start[base], start[base] + window_size[base]
+            ))
+            for base in needed
+        }
+        taken = set(model.objects.filter(
+            slug__in=[slug for window in windows.values() for slug in window]
+        ).values_list('slug', flat=True))
+        for base, window in windows.items():
+            for slug in window:
+                if needed[base] and slug not in taken and slug not in used:
+                    free[base].append(slug)
+                    used.add(slug)
+                    needed[base] -= 1
+            start[base] += window_size[base]
+            window_size[base] = needed[base] + SUFFIX_WINDOW
+        needed = +needed
+    free = {base: iter(slugs) for base, slugs in free.items()}
+    return [next(free[base]) for base in bases]
+
+
+def bulk_create_with_unique_slugs(model, objs):
+    """
+    bulk_create, который заменяет занятые slug объектов свободными.
+
+    Если между подбором и вставкой slug занял кто-то другой,
+    подбор повторяется, как в save_with_unique_slug.
+    """
+    objs = list(objs)
+    bases = [obj.slug for obj in objs]
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        for obj, slug in zip(objs, unique_slugs(model, bases)):
+            obj.slug = slug
+        try:
+            with transaction.atomic():
+                return model.objects.bulk_create(objs)
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS:
+                raise
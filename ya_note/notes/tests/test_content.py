@@ -1,8 +1,19 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+
 from notes.forms import NoteForm
 from notes.models import Note
 from notes.tests.test_utils import (ADD_URL, EDIT_URL, LIST_URL,
-                                    BaseTestCaseWithNote,
+                                    MANY_NOTES_AUTHOR, MANY_NOTES_COUNT,
+                                    SEARCH_URL, BaseTestCaseWithNote,
                                     BaseTestCaseWithoutNote)
+from yacommon.testing.snapshots import SnapshotTestCase, load
+
+User = get_user_model()
 
 
 class TestListPage(BaseTestCaseWithoutNote):
@@ -44,6 +55,72 @@ class TestListPage(BaseTestCaseWithoutNote):
             "На странице отображаются заметки другого пользователя"
         )
 
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+    def test_notes_list_keyset_pagination(self):
+        """Проверка постраничного вывода и отсутствия текста в выборке."""
+        response = self.author_client.get(LIST_URL)
+        first_page = response.context['object_list']
+        self.assertEqual(len(first_page), 2)
+        self.assertIn('text', first_page[0].get_deferred_fields())
+        response = self.author_client.get(
+            LIST_URL, {'after': response.context['next_after']}
+        )
+        second_page = response.context['object_list']
+        self.assertEqual(len(second_page), 1)
+        self.assertIsNone(response.context['next_after'])
+        all_ids = [note.id for note in [*first_page, *second_page]]
+        self.assertEqual(
+            all_ids,
+            list(
+                Note.objects.filter(author=self.author)
+                .order_by('id').values_list('id', flat=True)
+            )
+        )
+
+
+class TestListPageAtScale(SnapshotTestCase):
+    """
+    Тестирование списка заметок на тысячах записей.
+    Набор many_notes строится один раз и восстанавливается из снимка.
+    """
+    dataset = 'many_notes'
+
+    def setUp(self):
+        self.author = User.objects.get(username=MANY_NOTES_AUTHOR)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=500)
+    def test_notes_list_pages_cover_all_author_notes(self):
+        """Проверка, что страницы списка вместе дают все заметки автора."""
+        note_ids = []
+        after = None
+        while True:
+            response = self.author_client.get(
+                LIST_URL, {'after': after} if after else {}
+            )
+            note_ids += [note.id for note in response.context['object_list']]
+            after = response.context['next_after']
+            if after is None:
+                break
+        self.assertEqual(len(note_ids), MANY_NOTES_COUNT)
+        self.assertEqual(
+            note_ids,
+            list(
+                Note.objects.filter(author=self.author)
+                .order_by('id').values_list('id', flat=True)
+            )
+        )
+
+    def test_dataset_restored_from_snapshot(self):
+        """Проверка, что загрузка набора отменяет изменения теста."""
+        Note.objects.filter(author=self.author).delete()
+        load(self.dataset)
+        self.assertEqual(
+            Note.objects.filter(author__username=MANY_NOTES_AUTHOR).count(),
+            MANY_NOTES_COUNT
+        )
+
 
 class TestDetailPage(BaseTestCaseWithNote):
     """Тестирование страницы отдельной заметки."""
@@ -57,3 +134,96 @@ class TestDetailPage(BaseTestCaseWithNote):
             with self.subTest(name=url):
                 response = client.get(url)
                 self.assertIsInstance(response.context.get('form'), NoteForm)
+
+
+class TestSearchPage(BaseTestCaseWithNote):
+    """Тестирование полнотекстового поиска по заметкам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Note.objects.bulk_create([
+            Note(
+                title='Список покупок',
+                text='Купить молоко и <хлеб>',
+                slug='shopping',
+                author=cls.author,
+            ),
+            Note(
+                title='Молоко',
+                text='Чужая заметка про молоко',
+                slug='milk',
+                author=cls.reader,
+            ),
+        ])
+
+    def test_search_finds_only_own_notes(self):
+        """Поиск идёт по префиксу и только по заметкам автора."""
+        response = self.author_client.get(SEARCH_URL, {'q': 'молок'})
+        notes = response.context['object_list']
+        self.assertEqual([note.slug for note in notes], ['shopping'])
+        self.assertIn('<mark>молоко</mark>', notes[0].snippet)
+        self.assertIn('&lt;хлеб&gt;', notes[0].snippet)
+
+    def test_search_index_follows_updates(self):
+        """Триггеры обновляют индекс при изменении и удалении заметки."""
+        self.note.text = 'Новое слово: кефир'
+        self.note.save()
+        response = self.author_client.get(SEARCH_URL, {'q': 'кефир'})
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.note.delete()
+        response = self.author_client.get(SEARCH_URL, {'q': 'кефир'})
+        self.assertEqual(len(response.context['object_list']), 0)
+
+    def test_search_index_follows_queryset_writes(self):
+        """Запись через update и bulk_update тоже обновляет индекс."""
+        Note.objects.filter(pk=self.note.pk).update(text='Про ряженку')
+        response = self.author_client.get(SEARCH_URL, {'q': 'ряженк'})
+        self.assertEqual(len(response.context['object_list']), 1)
+        self.note.text = 'Про айран'
+        Note.objects.bulk_update([self.note], ['text'])
+        response = self.author_client.get(SEARCH_URL, {'q': 'ряженк'})
+        self.assertEqual(len(response.context['object_list']), 0)
+        response = self.author_client.get(SEARCH_URL, {'q': 'айран'})
+        self.assertEqual(len(response.context['object_list']), 1)
+
+    def test_index_triggers_work_without_django_functions(self):
+        """Триггеры индекса не вызывают функцию notes_text из Django."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT sql FROM sqlite_master "
+                "WHERE type = 'trigger' AND tbl_name = 'notes_note'"
+            )
+            triggers = [sql for sql, in cursor.fetchall()]
+        self.assertEqual(len(triggers), 3)
+        for sql in triggers:
+            self.assertNotIn('notes_text', sql)
+
+    def test_rebuild_command_reads_text_changed_outside_django(self):
+        """rebuild_notes_index перечитывает текст, изменённый напрямую."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE notes_note SET text = %s WHERE id = %s',
+                ['Про варенец', self.note.pk],
+            )
+        call_command('rebuild_notes_index', stdout=StringIO())
+        response = self.author_client.get(SEARCH_URL, {'q': 'варенец'})
+        self.assertEqual(len(response.context['object_list']), 1)
+
+    def test_search_finds_words_in_compressed_text(self):
+        """Индекс видит текст длинной заметки, хранящийся сжатым."""
+        Note.objects.create(
+            title='Длинная заметка',
+            text='Повторяем пройденное. ' * 500 + 'Итог: простокваша.',
+            slug='long',
+            author=self.author,
+        )
+        response = self.author_client.get(SEARCH_URL, {'q': 'простокваш'})
+        notes = response.context['object_list']
+        self.assertEqual([note.slug for note in notes], ['long'])
+        self.assertIn('<mark>простокваша</mark>', notes[0].snippet)
+
+    def test_search_ignores_query_syntax(self):
+        """Спецсимволы FTS5 в запросе не ломают поиск."""
+        response = self.author_client.get(SEARCH_URL, {'q': '"молоко*) -('})
+        self.assertEqual(len(response.context['object_list']), 1)
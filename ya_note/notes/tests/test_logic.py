@@ -1,11 +1,30 @@
+import json
+import os
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from unittest.mock import patch
 
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldError
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from pytils.translit import slugify
 
+from notes.fields import FORMAT_PLAIN, FORMAT_ZLIB
 from notes.forms import WARNING
 from notes.models import Note
-from notes.tests.test_utils import (ADD_URL, DELETE_URL, DONE_URL, EDIT_URL,
-                                    BaseTestCaseWithNote, NoteCreationForm)
+from notes.slugs import find_free_slug, unique_slugs
+from notes.tests.test_utils import (ADD_URL, DEFAULT_SLUG, DELETE_URL,
+                                    DETAIL_URL, DONE_URL, EDIT_URL, LIST_URL,
+                                    BaseTestCaseWithNote,
+                                    BaseTestCaseWithoutNote, NoteCreationForm)
+from yacommon.routers import (PRIMARY_COOKIE, REPLICA_DB_ALIAS,
+                              PrimaryReplicaRouter)
 
 
 class TestNoteCreation(NoteCreationForm):
@@ -55,6 +74,41 @@ class TestNoteCreation(NoteCreationForm):
         self.assertEqual(Note.objects.get().slug, new_slug)
 
 
+class TestSlugAllocation(NoteCreationForm):
+    """Тестирование подбора уникального slug без предварительных проверок."""
+
+    # Подбор суффикса после конфликта стоит дополнительных запросов.
+    @pytest.mark.query_budget(12, view_name='notes:add')
+    def test_same_title_gets_numbered_slug(self):
+        """Повтор заголовка даёт slug с суффиксом вместо ошибки."""
+        self.form_data.pop('slug')
+        for _ in range(3):
+            self.author_client.post(ADD_URL, data=self.form_data)
+        base = slugify(self.form_data['title'])
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {base, f'{base}-2', f'{base}-3'}
+        )
+
+    def test_note_creation_is_single_insert(self):
+        """Создание заметки стоит ровно одного запроса к таблице заметок."""
+        self.form_data.pop('slug')
+        with CaptureQueriesContext(connection) as context:
+            self.author_client.post(ADD_URL, data=self.form_data)
+        note_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"notes_note"' in query['sql']
+        ]
+        self.assertEqual(len(note_queries), 1)
+        self.assertTrue(note_queries[0].startswith('INSERT'))
+
+    def test_suffix_respects_max_length(self):
+        """Суффикс не выводит slug за пределы max_length."""
+        base = 'a' * 100
+        Note.objects.create(title='Длинная', slug=base, author=self.author)
+        self.assertEqual(find_free_slug(Note, base), 'a' * 98 + '-2')
+
+
 class TestNoteCreationValidate(BaseTestCaseWithNote, NoteCreationForm):
     """
     Тестирование логики валидации данных для создания заметки.
@@ -139,3 +193,182 @@ class TestCommentEditDelete(BaseTestCaseWithNote, NoteCreationForm):
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         refreshed_note = Note.objects.get(pk=self.note.pk)
         self.assertEqual(refreshed_note.text, note_text)
+
+
+class TestCompressedText(BaseTestCaseWithoutNote):
+    """Тестирование хранения текста заметок в сжатом виде."""
+
+    def stored_text(self, note):
+        """Формат и размер text в базе, в обход ORM."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT text FROM notes_note WHERE id = %s', (note.id,)
+            )
+            value = bytes(cursor.fetchone()[0])
+        return value[0], len(value)
+
+    def test_long_text_stored_compressed(self):
+        """Длинный текст сжимается и читается без изменений."""
+        text = 'Очень длинная заметка. ' * 1000
+        note = Note.objects.create(
+            title='Длинная', text=text, slug='long', author=self.author
+        )
+        kind, size = self.stored_text(note)
+        self.assertEqual(kind, FORMAT_ZLIB)
+        self.assertLess(size, len(text.encode()) / 10)
+        self.assertEqual(Note.objects.get(id=note.id).text, text)
+
+    def test_short_text_stored_as_is(self):
+        """Короткий текст не сжимается."""
+        text = 'Купить хлеб'
+        note = Note.objects.create(
+            title='Короткая', text=text, slug='short', author=self.author
+        )
+        self.assertEqual(
+            self.stored_text(note), (FORMAT_PLAIN, 1 + len(text.encode()))
+        )
+        self.assertEqual(Note.objects.get(id=note.id).text, text)
+
+    def test_pattern_lookups_rejected(self):
+        """Поиск по шаблону в сжатом тексте не проходит молча."""
+        text = 'Купить хлеб'
+        Note.objects.create(
+            title='Короткая', text=text, slug='short', author=self.author
+        )
+        self.assertTrue(Note.objects.filter(text=text).exists())
+        for lookup in ('contains', 'icontains', 'startswith', 'gt'):
+            with self.subTest(lookup=lookup):
+                with self.assertRaises(FieldError):
+                    Note.objects.filter(**{f'text__{lookup}': 'хлеб'})
+
+
+class TestSeedData(TestCase):
+    """Тестирование генератора синтетических данных."""
+
+    def test_seed_data_creates_notes_in_batches(self):
+        call_command(
+            'seed_data', users=3, notes=20, batch_size=7, stdout=StringIO()
+        )
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(Note.objects.count(), 20)
+        self.assertEqual(
+            Note.objects.values('slug').distinct().count(), 20
+        )
+
+
+class TestNotesImportExport(BaseTestCaseWithNote):
+    """Тестирование массовой выгрузки и загрузки заметок."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive = os.path.join(directory.name, 'notes.jsonl')
+
+    def test_same_bases_in_batch_get_distinct_slugs(self):
+        """Совпадающие основы в пачке получают разные свободные slug."""
+        for slug in ('a-3', 'b', 'b-2'):
+            Note.objects.create(
+                title='Занят', text='Текст', slug=slug, author=self.author
+            )
+        bases = [DEFAULT_SLUG, 'a', 'a', 'a-2', 'a', 'b']
+        with CaptureQueriesContext(connection) as context:
+            slugs = unique_slugs(Note, bases)
+        self.assertEqual(
+            slugs,
+            [f'{DEFAULT_SLUG}-2', 'a', 'a-2', 'a-2-2', 'a-4', 'b-3'],
+        )
+        # Второе окно понадобилось только для основы «b».
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_import_restores_export(self):
+        """Выгрузка загружается обратно, занятые slug получают суффикс."""
+        Note.objects.create(
+            title='Длинная', text='Текст ' * 1000, slug='long',
+            author=self.reader,
+        )
+        call_command('export_notes', output=self.archive, stderr=StringIO())
+        stdout = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_notes', self.archive, stdout=stdout)
+        self.assertIn('Создано заметок: 2', stdout.getvalue())
+        slug_queries = [
+            query for query in context.captured_queries
+            if '"slug" IN' in query['sql']
+        ]
+        self.assertEqual(len(slug_queries), 1)
+        self.assertEqual(
+            set(Note.objects.values_list('slug', 'author__username', 'text')),
+            {
+                (DEFAULT_SLUG, self.author.username, self.note.text),
+                (f'{DEFAULT_SLUG}-2', self.author.username, self.note.text),
+                ('long', self.reader.username, 'Текст ' * 1000),
+                ('long-2', self.reader.username, 'Текст ' * 1000),
+            },
+        )
+
+    def test_import_rejects_bad_rows(self):
+        """Плохие строки отклоняются, остальные загружаются."""
+        records = (
+            {'title': 'Без slug', 'text': 'Текст', 'author': 'Гость'},
+            {'title': 'x' * 101, 'text': 'Текст', 'author': 'Гость'},
+            {'title': 'Без автора', 'text': 'Текст'},
+            {'title': 'Чужой', 'text': 'Текст', 'author': 'Никто'},
+        )
+        with open(self.archive, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+        stderr = StringIO()
+        call_command(
+            'import_notes', self.archive, batch_size=3, stdout=StringIO(),
+            stderr=stderr,
+        )
+        self.assertEqual(stderr.getvalue().count('Строка'), 4)
+        self.assertEqual(Note.objects.count(), 1)
+        get_user_model().objects.create_user(username='Гость')
+        call_command(
+            'import_notes', self.archive, stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        note = Note.objects.get(slug=slugify('Без slug'))
+        self.assertEqual(note.author.username, 'Гость')
+
+
+class TestReplicaRouting(BaseTestCaseWithNote, NoteCreationForm):
+    """Тестирование чтения с реплики и возврата на основную базу."""
+
+    def setUp(self):
+        # Свой клиент: кука основной базы не должна перейти в другие тесты.
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def read_aliases(self, url):
+        """Базы, с которых читались заметки при запросе url."""
+        aliases = set()
+        db_for_read = PrimaryReplicaRouter.db_for_read
+
+        def recording_db_for_read(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            if model._meta.app_label == 'notes':
+                aliases.add(alias)
+            return alias
+
+        with patch.object(
+            PrimaryReplicaRouter, 'db_for_read', recording_db_for_read
+        ):
+            self.client.get(url)
+        return aliases
+
+    def test_note_pages_read_from_replica(self):
+        for url in (LIST_URL, DETAIL_URL):
+            with self.subTest(url=url):
+                self.assertEqual(self.read_aliases(url), {REPLICA_DB_ALIAS})
+
+    def test_author_reads_primary_after_create(self):
+        response = self.client.post(ADD_URL, data=self.form_data)
+        self.assertEqual(
+            response.cookies[PRIMARY_COOKIE]['max-age'],
+            settings.REPLICA_STICKY_SECONDS,
+        )
+        for url in (LIST_URL, DETAIL_URL):
+            with self.subTest(url=url):
+                self.assertEqual(self.read_aliases(url), {DEFAULT_DB_ALIAS})
@@ -1,9 +1,16 @@
 from http import HTTPStatus
 
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
 from notes.tests.test_utils import (ADD_URL, DELETE_URL, DETAIL_URL, EDIT_URL,
                                     HOME_URL, LIST_URL, LOGIN_URL, LOGOUT_URL,
-                                    SIGNUP_URL, SUCCESS_URL,
+                                    SEARCH_URL, SIGNUP_URL, SUCCESS_URL,
                                     BaseTestCaseWithNote)
+from yacommon.auth import user_key
 
 
 class TestRoutes(BaseTestCaseWithNote):
@@ -27,6 +34,7 @@ class TestRoutes(BaseTestCaseWithNote):
             (LIST_URL, self.reader_client, status_ok),
             (ADD_URL, self.reader_client, status_ok),
             (SUCCESS_URL, self.reader_client, status_ok),
+            (SEARCH_URL, self.reader_client, status_ok),
             (DETAIL_URL, self.author_client, status_ok),
             (EDIT_URL, self.author_client, status_ok),
             (DELETE_URL, self.author_client, status_ok),
@@ -51,6 +59,7 @@ class TestRoutes(BaseTestCaseWithNote):
             DELETE_URL,
             ADD_URL,
             SUCCESS_URL,
+            SEARCH_URL,
         )
 
         for url in pages:
@@ -58,3 +67,33 @@ class TestRoutes(BaseTestCaseWithNote):
                 redirect_url = f'{LOGIN_URL}?next={url}'
                 response = self.anonymous_client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+    def test_query_count_headers(self):
+        """Ответ сообщает число SQL-запросов и их время."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.author_client.get(DETAIL_URL)
+        self.assertEqual(
+            int(response['X-Query-Count']), len(context.captured_queries)
+        )
+        self.assertGreaterEqual(float(response['X-Query-Time-Ms']), 0)
+
+    def test_authenticated_page_has_no_auth_queries(self):
+        """Сессия и пользователь в установившемся режиме берутся из кеша."""
+        self.author_client.get(SUCCESS_URL)
+        with self.assertNumQueries(0):
+            response = self.author_client.get(SUCCESS_URL)
+        self.assertEqual(response.context['user'], self.author)
+
+    @pytest.mark.query_budget(3, view_name='notes:success')
+    def test_cached_user_dropped_on_password_change(self):
+        """Смена пароля сбрасывает копию пользователя в кеше."""
+        client = Client()
+        client.force_login(self.author)
+        client.get(SUCCESS_URL)
+        self.assertIsNotNone(cache.get(user_key(self.author.pk)))
+        self.author.set_password('new-password-123')
+        self.author.save()
+        self.assertIsNone(cache.get(user_key(self.author.pk)))
+        # Хеш сессии больше не совпадает, и клиент разлогинен.
+        response = client.get(SUCCESS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
@@ -3,6 +3,7 @@ from django.test import Client, TestCase
 from django.urls import reverse
 
 from notes.models import Note
+from yacommon.testing.snapshots import dataset
 
 User = get_user_model()
 
@@ -18,6 +19,11 @@ HOME_URL = reverse('notes:home')
 SIGNUP_URL = reverse('users:signup')
 LOGOUT_URL = reverse('users:logout')
 SUCCESS_URL = reverse('notes:success')
+SEARCH_URL = reverse('notes:search')
+
+MANY_NOTES_AUTHOR = 'IAmAuthorTrustMe'
+MANY_NOTES_READER = 'IAmReaderDontTrustMe'
+MANY_NOTES_COUNT = 2000
 
 
 class BaseTestCaseWithoutNote(TestCase):
@@ -89,3 +95,26 @@ class NoteCreationForm(BaseTestCaseWithoutNote):
             'text': 'Текст',
             'slug': 'test-create-slug'
         }
+
+
+@dataset('many_notes')
+def build_many_notes():
+    """
+    Набор для тестов на объёме: тысячи заметок автора и несколько
+    заметок читателя. Загружается через SnapshotTestCase.
+    """
+    author = User.objects.create_user(username=MANY_NOTES_AUTHOR)
+    reader = User.objects.create_user(username=MANY_NOTES_READER)
+    Note.objects.bulk_create(
+        Note(
+            title=f'Заметка № {index}',
+            text='Почему именно 42?!.',
+            author=author,
+            slug=f'many-{index}',
+        )
+        for index in range(MANY_NOTES_COUNT)
+    )
+    Note.objects.bulk_create(
+        Note(title='Чужая заметка', text='Текст', author=reader, slug=slug)
+        for slug in ('reader-1', 'reader-2')
+    )
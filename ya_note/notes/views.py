@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest
+from django.db import IntegrityError, transaction
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from yacommon.routers import ReplicaReadMixin
+
+from .forms import WARNING, NoteForm
 from .models import Note
+from .search import search_notes
+from .slugs import slug_is_taken
 
 
 class Home(generic.TemplateView):
@@ -26,34 +33,94 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
+class NoteFormMixin:
+    """Показывает ошибку формы, если заданный вручную slug уже занят."""
+    form_class = NoteForm
+
+    def form_valid(self, form):
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            slug = form.instance.slug
+            if not slug_is_taken(Note, slug, form.instance.pk):
+                raise
+            form.add_error('slug', slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
     """Добавление заметки."""
     template_name = 'notes/form.html'
-    form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
-
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    def get_queryset(self):
+        # Текст нужен только странице подтверждения, при удалении
+        # он не загружается в Python. Старый текст для индекса
+        # распаковывает в SQLite триггер notes_note_fts_delete.
+        notes = super().get_queryset()
+        if self.request.method == 'POST':
+            return notes.defer('text')
+        return notes
+
+
+class NotesList(ReplicaReadMixin, NoteBase, generic.ListView):
+    """
+    Список всех заметок пользователя.
+
+    Выводится постранично: следующая страница начинается после
+    заметки с id из параметра ?after=. Текст заметок не загружается.
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        notes = super().get_queryset().defer('text').order_by('id')
+        after = self.request.GET.get('after')
+        if after:
+            try:
+                notes = notes.filter(id__gt=int(after))
+            except ValueError as error:
+                raise BadRequest(f'Некорректный after: {after}') from error
+        # Лишняя заметка показывает, что есть следующая страница.
+        return notes[:settings.NOTES_COUNT_ON_LIST_PAGE + 1]
+
+    def get_context_data(self, **kwargs):
+        page_size = settings.NOTES_COUNT_ON_LIST_PAGE
+        notes = list(self.object_list)
+        context = super().get_context_data(
+            object_list=notes[:page_size], **kwargs
+        )
+        context['next_after'] = (
+            notes[page_size - 1].id if len(notes) > page_size else None
+        )
+        return context
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user,
+            self.request.GET.get('q', ''),
+            settings.NOTES_COUNT_ON_LIST_PAGE,
+        )
+
 
-class NoteDetail(NoteBase, generic.DetailView):
+class NoteDetail(ReplicaReadMixin, NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
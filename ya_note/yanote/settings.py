@@ -1,9 +1,14 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий для YaNews и YaNote пакет yacommon лежит в корне репозитория.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
 
 DEBUG = False
@@ -18,10 +23,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'notes.apps.NotesConfig'
+    'notes.apps.NotesConfig',
+    'yacommon',
 ]
 
 MIDDLEWARE = [
+    'yacommon.middleware.QueryCountMiddleware',
+    'yacommon.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,9 +64,55 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # По умолчанию реплика — тот же файл. Отдельная копия с ручной
+    # синхронизацией настроена в settings_replica.py.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['yacommon.routers.PrimaryReplicaRouter']
+
+# Приложения, чьи модели представления могут читать с реплики.
+REPLICA_APP_LABELS = ('notes',)
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_STICKY_SECONDS = 15
+
+# locmem у каждого процесса свой: годится для разработки и тестов,
+# где воркер один. Боевой общий кеш настраивается в settings_prod.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yacommon.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+
+# Сессия и пользователь берутся из кеша, база нужна только при промахе.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedModelBackend']
+
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +141,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 50
+
+# Выгрузка и загрузка заметок: строк в одном запросе или транзакции.
+EXPORT_NOTES_BATCH_SIZE = 500
+IMPORT_NOTES_BATCH_SIZE = 500
+
+# Допустимое число SQL-запросов на один HTTP-запрос по имени маршрута.
+QUERY_BUDGETS = {
+    'notes:home': 0,
+    'notes:list': 3,
+    'notes:search': 3,
+    'notes:success': 2,
+    'notes:detail': 3,
+    # Сохранение заметки записывает её текст в полнотекстовый индекс.
+    'notes:add': 8,
+    'notes:edit': 7,
+    'notes:delete': 4,
+}
@@ -0,0 +1,7 @@
+# Быстрый профиль для тестов, его подключает pytest.ini.
+# Настройки проекта импортируются первыми: они добавляют
+# в sys.path корень репозитория с пакетом yacommon.
+from . import settings
+from yacommon.testing.settings import test_settings
+
+globals().update(test_settings(settings))
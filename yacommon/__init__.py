@@ -0,0 +1,8 @@
+"""
+Общий код проектов YaNews и YaNote.
+
+Пакет лежит в корне репозитория: settings обоих проектов добавляют
+корень в sys.path, а pytest — через pythonpath в pytest.ini.
+Проекты подключают отсюда общие механизмы и настраивают их только
+своими параметрами в settings.
+"""
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class YacommonConfig(AppConfig):
+    name = 'yacommon'
+    verbose_name = 'Общий код проектов'
+
+    def ready(self):
+        from . import auth, checks, db  # noqa: F401
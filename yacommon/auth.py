@@ -0,0 +1,56 @@
+"""
+Кешированная загрузка пользователя по сессии.
+
+AuthenticationMiddleware на каждом запросе достаёт пользователя через
+backend.get_user(). CachedModelBackend сначала ищет его в кеше, поэтому
+вместе с сессиями cached_db авторизованный запрос в установившемся
+режиме не обращается к базе. Копия сбрасывается при сохранении или
+удалении пользователя (в том числе при смене пароля и входе) и при
+выходе. QuerySet.update() сигналов не отправляет, копия в этом случае
+доживёт до конца AUTH_USER_CACHE_TIMEOUT.
+
+Сброс доходит до всех воркеров, только если кеш у них общий, иначе
+сменивший пароль или деактивированный пользователь оставался бы
+в кеше остальных процессов. Проверка yacommon.E001 в check --deploy
+не даёт выкатить бэкенд с locmem.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_logged_out
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+USER_KEY = 'auth-user:{pk}'
+
+
+def user_key(pk):
+    return USER_KEY.format(pk=pk)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который держит копию пользователя в кеше."""
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(
+                    key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT
+                )
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+    """Изменённый или удалённый пользователь больше не берётся из кеша."""
+    cache.delete(user_key(instance.pk))
+
+
+@receiver(user_logged_out)
+def forget_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        cache.delete(user_key(user.pk))
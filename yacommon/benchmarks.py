@@ -0,0 +1,179 @@
+"""
+Замеры производительности: сводки, отчёты и основа benchmark_urls.
+
+Команда benchmark_urls приложения наследует UrlBenchmarkCommand
+и задаёт только то, что зависит от приложения:
+
+    class Command(UrlBenchmarkCommand):
+        project = 'ya_note'
+        urls = urls
+
+        def prepare(self):
+            ...
+
+        def count_rows(self):
+            ...
+"""
+import json
+import logging
+import statistics
+import time
+from abc import ABCMeta, abstractmethod
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+from django.test import Client
+from django.utils import timezone
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(timings):
+    """Сводка замеров в миллисекундах: перцентили и среднее."""
+    summary = {
+        f'p{percent}': round(percentile(timings, percent), 3)
+        for percent in PERCENTILES
+    }
+    summary['mean'] = round(statistics.mean(timings), 3)
+    return summary
+
+
+def create_in_batches(model, objs, batch_size):
+    """
+    Сохраняет ленивую последовательность объектов пачками.
+
+    В памяти одновременно держится не больше batch_size объектов,
+    каждая пачка сохраняется в своей транзакции. Журнал запросов
+    при DEBUG очищается, иначе он разрастается до сотен мегабайт.
+    """
+    objs = iter(objs)
+    created = 0
+    while batch := list(islice(objs, batch_size)):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        reset_queries()
+        created += len(batch)
+    return created
+
+
+def write_report(report, path):
+    report = {'created': timezone.now().isoformat(), **report}
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare_reports(previous, current):
+    """Строки с изменением p50, p95 и числа запросов по каждому адресу."""
+    lines = []
+    for name, result in current['urls'].items():
+        before = previous['urls'].get(name)
+        if before is None:
+            lines.append(f'{name}: нет в прошлом замере')
+            continue
+        changes = ', '.join(
+            f'{key} {before[key]:.2f} → {result[key]:.2f} мс'
+            for key in ('p50', 'p95')
+        )
+        lines.append(
+            f'{name}: {changes}, запросов '
+            f'{before["queries"]} → {result["queries"]}'
+        )
+    return lines
+
+
+class UrlBenchmarkCommand(BaseCommand, metaclass=ABCMeta):
+    """Замер каждого именованного адреса urls от имени одного пользователя."""
+
+    # Имя проекта в отчёте и модуль urls с app_name и urlpatterns.
+    project = None
+    urls = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--output',
+            default='benchmark_urls.json',
+            help='Файл для результатов в формате JSON.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого замера, с которым сравнить результаты.',
+        )
+
+    def handle(self, *args, **options):
+        user, requests = self.prepare()
+        # Строки журнала, в том числе о превышении бюджета, заглушили бы
+        # сам отчёт: число запросов и так попадает в результаты.
+        logging.getLogger('yacommon.middleware').setLevel(logging.ERROR)
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(user)
+        results = {}
+        for pattern in self.urls.urlpatterns:
+            name = f'{self.urls.app_name}:{pattern.name}'
+            if name not in requests:
+                raise CommandError(f'Не задан запрос для адреса {name}.')
+            if requests[name] is None:
+                continue
+            results[name] = self.measure(client, *requests[name], options)
+            self.stdout.write(
+                f'{name}: p50 {results[name]["p50"]:.2f} мс, '
+                f'p95 {results[name]["p95"]:.2f} мс, '
+                f'p99 {results[name]["p99"]:.2f} мс, '
+                f'запросов {results[name]["queries"]}'
+            )
+        report = {
+            'project': self.project,
+            'requests': options['requests'],
+            'rows': {'users': User.objects.count(), **self.count_rows()},
+            'urls': results,
+        }
+        write_report(report, options['output'])
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
+        if options['compare']:
+            previous = load_report(options['compare'])
+            for line in compare_reports(previous, report):
+                self.stdout.write(line)
+
+    @abstractmethod
+    def prepare(self):
+        """
+        Пользователь для запросов и запросы по именам маршрутов.
+
+        Запрос — пара из адреса и GET-параметров, None — маршрут
+        не замеряется. Пустая база отклоняется через CommandError.
+        """
+
+    @abstractmethod
+    def count_rows(self):
+        """Число строк в таблицах приложения для отчёта."""
+
+    def measure(self, client, url, data, options):
+        for _ in range(options['warmup']):
+            client.get(url, data)
+        timings = []
+        for _ in range(options['requests']):
+            started = time.perf_counter()
+            response = client.get(url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'url': url,
+            'status': response.status_code,
+            'queries': int(response.get('X-Query-Count', -1)),
+            **summarize(timings),
+        }
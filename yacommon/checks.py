@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+CACHED_BACKEND = 'yacommon.auth.CachedModelBackend'
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Бэкенду CachedModelBackend нужен кеш, общий для всех воркеров.
+
+    Сигналы сбрасывают копию пользователя только в кеше своего
+    процесса: с locmem остальные воркеры до AUTH_USER_CACHE_TIMEOUT
+    пускали бы по старому паролю и деактивированных пользователей.
+    """
+    if CACHED_BACKEND not in settings.AUTHENTICATION_BACKENDS:
+        return []
+    if not isinstance(caches['default'], LocMemCache):
+        return []
+    return [
+        Error(
+            'CachedModelBackend работает с кешем LocMemCache, '
+            'который у каждого процесса свой.',
+            hint='Настройте в CACHES общий кеш: файловый или memcached.',
+            id='yacommon.E001',
+        )
+    ]
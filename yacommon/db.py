@@ -0,0 +1,44 @@
+from importlib import import_module
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.migrations.loader import MigrationLoader
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Выполняет PRAGMA из ключа PRAGMAS настроек базы данных.
+
+    Django передаёт OPTIONS прямо в sqlite3.connect, поэтому прагмы
+    хранятся отдельным ключом и применяются к каждому новому соединению.
+    """
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def create_fts_without_migrations(sender, using, **kwargs):
+    """
+    Создаёт индекс FTS5 приложения, если его схема собрана без миграций.
+
+    Так строит базу тестовый профиль settings_test: таблицы создаются
+    по моделям, а индекс и триггеры описаны только в миграции,
+    поэтому её CREATE_SQL выполняется здесь. Приложение подключает
+    обработчик к post_migrate в ready и задаёт в своём AppConfig
+    fts_table — имя индекса и fts_migration — модуль миграции.
+    """
+    module, _ = MigrationLoader.migrations_module(sender.label)
+    connection = connections[using]
+    if module is not None or connection.vendor != 'sqlite':
+        return
+    if sender.fts_table in connection.introspection.table_names():
+        return
+    migration = import_module(sender.fts_migration)
+    with connection.cursor() as cursor:
+        for statement in migration.CREATE_SQL:
+            cursor.execute(statement)
@@ -0,0 +1,158 @@
+"""
+Основа команд, загружающих записи из JSON Lines пачками.
+
+Команда читает файл или стандартный ввод, делит строки на пачки
+по --batch-size и передаёт каждую пачку import_batch вместе с номерами
+строк. Строка разбирается в parse_record, плохие строки отклоняются
+через reject: номер строки и причина пишутся в stderr, загрузка идёт
+дальше. Авторы ищутся по имени одним запросом на пачку. В конце
+печатается итог с числом принятых строк в секунду.
+
+    class Command(BatchImportCommand):
+        batch_size_setting = 'IMPORT_NOTES_BATCH_SIZE'
+
+        def parse_record(self, record):
+            ...
+
+        def import_batch(self, batch):
+            ...
+"""
+import json
+import sys
+import time
+from abc import ABCMeta, abstractmethod
+from contextlib import nullcontext
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+User = get_user_model()
+
+
+class BatchImportCommand(BaseCommand, metaclass=ABCMeta):
+    """Загрузка JSON Lines пачками, каждая пачка — в import_batch."""
+
+    # Имя настройки с размером пачки по умолчанию.
+    batch_size_setting = None
+    input_help = 'Файл JSON Lines, «-» — стандартный ввод.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help=self.input_help)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, self.batch_size_setting),
+            help='Сколько строк сохранять в одной транзакции.',
+        )
+        parser.add_argument(
+            '--create-authors',
+            action='store_true',
+            help='Создавать неизвестных авторов без пароля.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть положительным.')
+        self.create_authors = options['create_authors']
+        self.authors = {}
+        self.rejected = 0
+        skip = self.start(options)
+        started = time.perf_counter()
+        with self.open_input(options['input']) as lines:
+            numbered = islice(enumerate(lines, 1), skip, None)
+            while batch := list(islice(numbered, options['batch_size'])):
+                self.import_batch(batch)
+                self.batch_saved(batch[-1][0])
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Сохранено до строки {batch[-1][0]}')
+        elapsed = time.perf_counter() - started
+        self.finish()
+        self.stdout.write(
+            f'{self.summary()}, '
+            f'отклонено строк: {self.rejected} за {elapsed:.1f} с '
+            f'({self.imported / max(elapsed, 1e-9):.0f} строк/с)',
+            style_func=self.style.SUCCESS,
+        )
+
+    def start(self, options):
+        """Готовит счётчики команды, возвращает число строк для пропуска."""
+        return 0
+
+    def batch_saved(self, line):
+        """Вызывается после сохранения пачки, кончающейся строкой line."""
+
+    def finish(self):
+        """Вызывается после последней пачки."""
+
+    @property
+    @abstractmethod
+    def imported(self):
+        """Число принятых строк для итоговой скорости."""
+
+    @abstractmethod
+    def summary(self):
+        """Начало итоговой строки: что и сколько принято."""
+
+    @abstractmethod
+    def parse_record(self, record):
+        """
+        Разбирает запись-словарь из строки файла.
+
+        Исключение ValueError или ValidationError отклоняет строку.
+        """
+
+    @abstractmethod
+    def import_batch(self, batch):
+        """Сохраняет пачку пар (номер строки, строка)."""
+
+    def open_input(self, path):
+        if path == '-':
+            return nullcontext(sys.stdin)
+        try:
+            return open(path, encoding='utf-8')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {path}: {error}')
+
+    def reject(self, number, error):
+        self.rejected += 1
+        if isinstance(error, ValidationError):
+            error = '; '.join(error.messages)
+        self.stderr.write(f'Строка {number}: {error}')
+
+    def parse_batch(self, batch):
+        """Пары (номер строки, результат parse_record) без плохих строк."""
+        parsed = []
+        for number, line in batch:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValidationError('Запись должна быть объектом.')
+                parsed.append((number, self.parse_record(record)))
+            except (ValueError, ValidationError) as error:
+                self.reject(number, error)
+        return parsed
+
+    def resolve_authors(self, usernames):
+        """Дополняет кеш self.authors одним запросом на пачку."""
+        missing = usernames - self.authors.keys()
+        if not missing:
+            return
+        if self.create_authors:
+            User.objects.bulk_create(
+                (
+                    User(username=name, password=make_password(None))
+                    for name in missing
+                ),
+                ignore_conflicts=True,
+            )
+        self.authors.update(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'pk'
+            )
+        )
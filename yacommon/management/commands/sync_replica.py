@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yacommon.routers import REPLICA_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплику через backup API. '
+        'Заменяет репликацию при локальной проверке с двумя файлами.'
+    )
+
+    def handle(self, *args, **options):
+        if REPLICA_DB_ALIAS not in connections.databases:
+            raise CommandError('Реплика не настроена.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        replica = connections[REPLICA_DB_ALIAS]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        if primary.settings_dict['NAME'] == replica.settings_dict['NAME']:
+            raise CommandError('Реплика и основная база — один файл.')
+        started = time.perf_counter()
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+        self.stdout.write(
+            f'Реплика {replica.settings_dict["NAME"]} обновлена '
+            f'за {time.perf_counter() - started:.2f} с'
+        )
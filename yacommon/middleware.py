@@ -0,0 +1,119 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+
+from .routers import PRIMARY_COOKIE, RoutingState, routing_state
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после каждого запроса с числом SQL-запросов и их временем.
+queries_recorded = Signal()
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper, считающая запросы и время их выполнения."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class QueryCountMiddleware:
+    """
+    Считает SQL-запросы и их суммарное время для каждого запроса.
+
+    Результат отдаётся в заголовках X-Query-Count и X-Query-Time-Ms
+    и пишется в лог с именем маршрута. Запрос, превысивший бюджет
+    из settings.QUERY_BUDGETS, логируется как предупреждение.
+    Потоковые ответы не замеряются, у них этих заголовков нет.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        # Один объект соединения может стоять под несколькими
+        # псевдонимами, обёртку на него ставим один раз.
+        unique = {id(conn): conn for conn in connections.all()}
+        with ExitStack() as stack:
+            for connection in unique.values():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        if response.streaming:
+            # Тело потокового ответа читает базу уже после выхода
+            # из middleware, и счёт был бы неполным.
+            return response
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        query_time_ms = round(recorder.duration * 1000, 2)
+        response['X-Query-Count'] = recorder.count
+        response['X-Query-Time-Ms'] = query_time_ms
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        exceeded = budget is not None and recorder.count > budget
+        logger.log(
+            logging.WARNING if exceeded else logging.INFO,
+            'view=%s method=%s status=%s queries=%s budget=%s time_ms=%s',
+            view_name,
+            request.method,
+            response.status_code,
+            recorder.count,
+            budget,
+            query_time_ms,
+            extra={
+                'view_name': view_name,
+                'query_count': recorder.count,
+                'query_budget': budget,
+                'query_time_ms': query_time_ms,
+            },
+        )
+        queries_recorded.send(
+            sender=self.__class__,
+            request=request,
+            view_name=view_name,
+            query_count=recorder.count,
+            query_time_ms=query_time_ms,
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Заводит состояние маршрутизации на время запроса.
+
+    Если запрос что-то записал, пользователь получает куку и
+    следующие settings.REPLICA_STICKY_SECONDS секунд читает
+    с основной базы, не дожидаясь, пока реплика догонит её.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState()
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        if state.wrote:
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
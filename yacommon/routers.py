@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+# Пока живёт эта кука, пользователь читает только с основной базы.
+PRIMARY_COOKIE = 'use_primary'
+
+
+class RoutingState:
+    """Состояние маршрутизации в рамках одного HTTP-запроса."""
+
+    def __init__(self):
+        self.replica_reads = False
+        self.wrote = False
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in connections.databases
+
+
+def use_replica(request):
+    """
+    Разрешает чтение с реплики до конца запроса.
+
+    Только для GET и HEAD и только если пользователь недавно
+    ничего не записывал: иначе он мог бы не увидеть свою запись.
+    """
+    state = routing_state.get()
+    if (
+        state is not None
+        and replica_configured()
+        and request.method in ('GET', 'HEAD')
+        and PRIMARY_COOKIE not in request.COOKIES
+    ):
+        state.replica_reads = True
+
+
+class ReplicaReadMixin:
+    """Представление на GET и HEAD читает с реплики, см. use_replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        use_replica(request)
+        return super().dispatch(request, *args, **kwargs)
+
+
+@contextmanager
+def primary_reads():
+    """Временно возвращает чтение на основную базу."""
+    state = routing_state.get()
+    if state is None or not state.replica_reads:
+        yield
+        return
+    state.replica_reads = False
+    try:
+        yield
+    finally:
+        state.replica_reads = True
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись — всегда в основную базу, чтение — в реплику,
+    если представление разрешило это через use_replica.
+
+    На реплику уходят только модели из settings.REPLICA_APP_LABELS:
+    сессии и пользователи только что вошедших должны читаться
+    с основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (
+            state is not None
+            and state.replica_reads
+            and model._meta.app_label in settings.REPLICA_APP_LABELS
+        ):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Явный ответ нужен: иначе Django записал бы объект,
+        # прочитанный с реплики, туда же.
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
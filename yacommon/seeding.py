@@ -0,0 +1,98 @@
+"""
+Основа команд seed_data, заполняющих базу синтетическими данными.
+
+Команда создаёт пользователей, а строки приложения сохраняет
+в seed_models пачками по --batch-size через seed и seed_with_ids.
+Фабрики моделей — генераторы объектов — остаются в приложении:
+
+    class Command(SeedCommand):
+        def seed_models(self, run, user_ids, options):
+            self.seed('заметок', Note, self.notes(run, user_ids))
+"""
+import random
+import time
+import uuid
+from abc import ABCMeta, abstractmethod
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from .benchmarks import create_in_batches
+
+User = get_user_model()
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+SEED_PASSWORD = 'seed-password'
+
+
+class SeedCommand(BaseCommand, metaclass=ABCMeta):
+    """Пользователи и строки приложения пачками, см. seed_models."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.vocabulary = [
+            ''.join(
+                self.rng.choice(ALPHABET)
+                for _ in range(self.rng.randint(3, 10))
+            )
+            for _ in range(5000)
+        ]
+        self.batch_size = options['batch_size']
+        run = uuid.uuid4().hex[:8]
+        user_ids = self.seed_with_ids(
+            'пользователей', User, self.users(run, options['users'])
+        )
+        self.seed_models(run, user_ids, options)
+
+    @abstractmethod
+    def seed_models(self, run, user_ids, options):
+        """
+        Сохраняет строки приложения.
+
+        run — метка запуска для уникальных значений, user_ids — id
+        созданных пользователей.
+        """
+
+    def seed(self, label, model, objs):
+        """Сохраняет объекты и возвращает число созданных строк."""
+        started = time.perf_counter()
+        created = create_in_batches(model, objs, self.batch_size)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Создано {label}: {created} за {elapsed:.1f} с '
+            f'({created / max(elapsed, 1e-9):.0f} строк/с)'
+        )
+        return created
+
+    def seed_with_ids(self, label, model, objs):
+        """
+        Как seed, но возвращает id созданных строк.
+
+        Нужен только для моделей, на которые ссылаются следующие:
+        список id остальных никому не нужен, а занял бы
+        память, которую пачки как раз экономят.
+        """
+        last_id = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        self.seed(label, model, objs)
+        # SQLite не возвращает id из bulk_create, поэтому
+        # новые строки находим как всё, что идёт после последней.
+        return list(
+            model.objects.filter(pk__gt=last_id).values_list('pk', flat=True)
+        )
+
+    def words(self, count):
+        return ' '.join(self.rng.choices(self.vocabulary, k=count))
+
+    def users(self, run, count):
+        # Хеширование пароля дорогое, одного хеша хватает на всех.
+        password = make_password(SEED_PASSWORD)
+        for index in range(count):
+            yield User(username=f'seed-{run}-{index}', password=password)
@@ -0,0 +1,59 @@
+"""Плагин pytest с общими фикстурами тестов обоих проектов."""
+import os
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yacommon.routers import REPLICA_DB_ALIAS
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(
+    django_db_modify_db_settings_parallel_suffix
+):
+    """
+    Шард run_tests_parallel.py работает со своей тестовой базой.
+
+    К имени базы в файле добавляется TEST_DB_SUFFIX, базы в памяти
+    и так у каждого процесса свои.
+    """
+    suffix = os.environ.get('TEST_DB_SUFFIX')
+    if not suffix:
+        return
+    for database in settings.DATABASES.values():
+        test = database.setdefault('TEST', {})
+        name = str(test.get('NAME') or '')
+        if name and ':memory:' not in name and 'mode=memory' not in name:
+            test['NAME'] = f'{name}_{suffix}'
+
+
+@pytest.fixture(autouse=True)
+def replica_shares_primary_connection(request):
+    """
+    В тестах реплика смотрит на ту же базу, но отдельное соединение
+    не увидело бы данных из незафиксированной транзакции теста.
+    """
+    # Доступ к базе тест получает до подмены: pytest-django запрещает
+    # запросы к необъявленной базе через её соединение и иначе
+    # запретил бы их основной базе.
+    for name in ('db', 'transactional_db'):
+        if name in request.fixturenames:
+            request.getfixturevalue(name)
+    replica = connections[REPLICA_DB_ALIAS]
+    connections[REPLICA_DB_ALIAS] = connections[DEFAULT_DB_ALIAS]
+    yield
+    connections[REPLICA_DB_ALIAS] = replica
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Кеш не должен переживать откат базы между тестами: id
+    пользователей и новостей повторяются, и закешированные
+    фрагменты и пользователи оказались бы чужими.
+    """
+    cache.clear()
+    yield
+    cache.clear()
@@ -0,0 +1,178 @@
+"""
+Плагин pytest, профилирующий каждый тест.
+
+Включается флагом --profile-tests. Для каждого теста записывается
+время фаз setup, call и teardown, время подготовки каждой фикстуры
+и число SQL-запросов за весь тест, включая фикстуры. setUpClass
+тестов на unittest, а с ним и setUpTestData, pytest выполняет
+скрытой фикстурой: в отчёте она называется <Класс>.setUpTestData.
+Фикстура учитывается в том тесте, для которого её готовили впервые,
+поэтому стоимость фикстур с областью class и session видна один раз.
+
+В конце сессии печатаются самые медленные тесты, самые дорогие
+фикстуры и тесты с наибольшим числом запросов, а полный профиль
+записывается в JSON.
+
+    pytest --profile-tests --profile-top=15 --profile-output=profile.json
+"""
+import json
+import time
+from contextlib import ExitStack
+
+import pytest
+
+UNITTEST_CLASS_FIXTURE = '_unittest_setUpClass_fixture_'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('profile-tests', 'профилирование тестов')
+    group.addoption(
+        '--profile-tests',
+        action='store_true',
+        help='Записать время, фикстуры и SQL-запросы каждого теста.',
+    )
+    group.addoption(
+        '--profile-top',
+        type=int,
+        default=10,
+        help='Сколько строк выводить в каждом разделе отчёта.',
+    )
+    group.addoption(
+        '--profile-output',
+        default='test_profile.json',
+        help='Файл для полного профиля в формате JSON.',
+    )
+
+
+def pytest_configure(config):
+    if config.getoption('profile_tests'):
+        config.pluginmanager.register(
+            TestProfiler(
+                config.getoption('profile_top'),
+                config.getoption('profile_output'),
+            ),
+            'test-profiler',
+        )
+
+
+def fixture_name(argname):
+    if argname.startswith(UNITTEST_CLASS_FIXTURE):
+        return f'{argname[len(UNITTEST_CLASS_FIXTURE):]}.setUpTestData'
+    return argname
+
+
+class TestProfiler:
+    """Собирает профиль тестов и печатает его в конце сессии."""
+
+    def __init__(self, top, output):
+        self.top = top
+        self.output = output
+        self.results = {}
+        self.current = None
+        self.nested = []
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        from django.db import connections
+
+        self.current = self.results[item.nodeid] = {
+            'nodeid': item.nodeid,
+            'duration': 0,
+            'setup': 0,
+            'call': 0,
+            'teardown': 0,
+            'queries': 0,
+            'fixtures': {},
+        }
+        # В тестах реплика подменяется основным соединением,
+        # одно соединение считаем один раз.
+        unique = {id(conn): conn for conn in connections.all()}
+        with ExitStack() as stack:
+            for connection in unique.values():
+                stack.enter_context(
+                    connection.execute_wrapper(self.count_query)
+                )
+            yield
+        self.current = None
+
+    def count_query(self, execute, sql, params, many, context):
+        if self.current is not None:
+            self.current['queries'] += 1
+        return execute(sql, params, many, context)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        # Фикстура может запросить другую через getfixturevalue прямо
+        # в своём коде: время вложенных вычитается, иначе оно
+        # учитывалось бы дважды.
+        self.nested.append(0)
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        own = elapsed - self.nested.pop()
+        if self.nested:
+            self.nested[-1] += elapsed
+        if self.current is None:
+            return
+        name = fixture_name(fixturedef.argname)
+        fixtures = self.current['fixtures']
+        fixtures[name] = fixtures.get(name, 0) + own
+
+    def pytest_runtest_logreport(self, report):
+        result = self.results.get(report.nodeid)
+        if result is None:
+            return
+        result[report.when] = report.duration
+        result['duration'] += report.duration
+
+    def summarize_fixtures(self):
+        """Число вызовов, суммарное и наибольшее время каждой фикстуры."""
+        fixtures = {}
+        for result in self.results.values():
+            for name, duration in result['fixtures'].items():
+                stats = fixtures.setdefault(
+                    name, {'calls': 0, 'total': 0, 'max': 0}
+                )
+                stats['calls'] += 1
+                stats['total'] += duration
+                stats['max'] = max(stats['max'], duration)
+        return fixtures
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.results:
+            return
+        write = terminalreporter.write_line
+        tests = sorted(
+            self.results.values(),
+            key=lambda result: result['duration'],
+            reverse=True,
+        )
+        fixtures = self.summarize_fixtures()
+        terminalreporter.write_sep('=', 'Профиль: самые медленные тесты')
+        for result in tests[:self.top]:
+            write(
+                f'{result["duration"]:7.3f} с  '
+                f'setup {result["setup"]:.3f} с  '
+                f'запросов {result["queries"]:4}  {result["nodeid"]}'
+            )
+        terminalreporter.write_sep('-', 'Профиль: самые дорогие фикстуры')
+        for name, stats in sorted(
+            fixtures.items(), key=lambda item: item[1]['total'], reverse=True
+        )[:self.top]:
+            write(
+                f'{stats["total"]:7.3f} с  вызовов {stats["calls"]:4}  '
+                f'максимум {stats["max"]:.3f} с  {name}'
+            )
+        terminalreporter.write_sep('-', 'Профиль: больше всего SQL-запросов')
+        for result in sorted(
+            tests, key=lambda result: result['queries'], reverse=True
+        )[:self.top]:
+            write(f'{result["queries"]:7}  {result["nodeid"]}')
+        with open(self.output, 'w', encoding='utf-8') as file:
+            json.dump(
+                {'tests': tests, 'fixtures': fixtures},
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+        write(f'Профиль записан в {self.output}')
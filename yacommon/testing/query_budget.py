@@ -0,0 +1,63 @@
+"""
+Плагин pytest, проверяющий бюджет SQL-запросов для маршрутов.
+
+Бюджеты задаются в settings.QUERY_BUDGETS по имени маршрута,
+счёт ведёт yacommon.middleware.QueryCountMiddleware. Тест падает, если
+хотя бы один HTTP-запрос в нём превысил бюджет своего маршрута.
+Маркер query_budget(limit, view_name=None) задаёт бюджет внутри теста:
+для конкретного маршрута или для всех запросов теста.
+"""
+import pytest
+
+violations_key = pytest.StashKey()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(limit, view_name=None): '
+        'допустимое число SQL-запросов на HTTP-запрос в тесте.',
+    )
+
+
+def get_budget(item, view_name):
+    from django.conf import settings
+
+    for marker in item.iter_markers('query_budget'):
+        marker_view = marker.kwargs.get('view_name')
+        if marker_view in (None, view_name):
+            return marker.args[0]
+    return settings.QUERY_BUDGETS.get(view_name)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    from yacommon.middleware import queries_recorded
+
+    violations = item.stash.setdefault(violations_key, [])
+
+    def check_budget(sender, request, view_name, query_count, **kwargs):
+        budget = get_budget(item, view_name)
+        if budget is not None and query_count > budget:
+            violations.append(
+                f'{request.method} {request.path} ({view_name}): '
+                f'{query_count} SQL-запросов при бюджете {budget}'
+            )
+
+    queries_recorded.connect(check_budget, weak=False)
+    try:
+        yield
+    finally:
+        queries_recorded.disconnect(check_budget)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    violations = item.stash.get(violations_key, None)
+    if call.when == 'call' and report.passed and violations:
+        report.outcome = 'failed'
+        report.longrepr = 'Превышен бюджет запросов:\n' + '\n'.join(
+            violations
+        )
@@ -0,0 +1,49 @@
+"""
+Быстрый профиль настроек для тестов обоих проектов.
+
+settings_test проекта берёт его поверх своих настроек:
+
+    from . import settings
+    from yacommon.testing.settings import test_settings
+
+    globals().update(test_settings(settings))
+"""
+
+
+class DisableMigrations:
+    """Схема строится прямо по моделям, миграции не проигрываются."""
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+def test_settings(settings):
+    """Настройки из модуля settings проекта с изменениями для тестов."""
+    result = {
+        name: value for name, value in vars(settings).items()
+        if name.isupper()
+    }
+    # Тестовая база SQLite — в памяти. Чтобы сохранять её между
+    # запусками (pytest --reuse-db), задайте в TEST файл: базы в памяти
+    # не переживают процесс.
+    result['DATABASES'] = {
+        **settings.DATABASES,
+        'default': {
+            **settings.DATABASES['default'], 'TEST': {'NAME': ':memory:'}
+        },
+    }
+    result['MIGRATION_MODULES'] = DisableMigrations()
+    # Стойкий хеш пароля занимает десятки миллисекунд на каждого
+    # пользователя из фикстур, MD5 — микросекунды.
+    result['PASSWORD_HASHERS'] = [
+        'django.contrib.auth.hashers.MD5PasswordHasher'
+    ]
+    result['DEBUG'] = False
+    result['TEMPLATES'] = [
+        {**engine, 'OPTIONS': {**engine['OPTIONS'], 'debug': False}}
+        for engine in settings.TEMPLATES
+    ]
+    return result
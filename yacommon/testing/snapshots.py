@@ -0,0 +1,120 @@
+"""
+Снимки тестовой базы SQLite для дорогих наборов данных.
+
+Набор данных регистрируется декоратором dataset(name) на функции,
+которая его создаёт. Первый тест, которому нужен набор, строит его
+в тестовой базе, после чего база копируется в снимок в памяти через
+backup API SQLite. Следующие тесты получают набор обратным
+копированием за миллисекунды вместо тысяч INSERT. После теста база
+возвращается к снимку, снятому до первой сборки.
+
+SQLite не копирует базу внутри открытой транзакции, поэтому снимки
+работают только с тестами без обёртки в транзакцию:
+для Django это SnapshotTestCase на основе TransactionTestCase,
+для pytest-django — фикстура load_dataset, которая требует
+transactional_db. На другой СУБД SnapshotTestCase падает
+с ImproperlyConfigured, а тесты с load_dataset пропускаются.
+
+    @dataset('many_notes')
+    def build_many_notes():
+        Note.objects.bulk_create(...)
+
+    def test_list(load_dataset):
+        load_dataset('many_notes')
+"""
+import sqlite3
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.transaction import TransactionManagementError
+from django.test import TransactionTestCase
+
+# Снимок базы до сборки первого набора.
+CLEAN = ''
+
+builders = {}
+snapshots = {}
+
+
+def dataset(name):
+    """Регистрирует функцию, создающую набор данных name."""
+    def register(builder):
+        builders[name] = builder
+        return builder
+    return register
+
+
+def sqlite_connection(using):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise ImproperlyConfigured(
+            f'Снимки базы есть только для SQLite, а {using} — '
+            f'{connection.vendor}.'
+        )
+    if connection.in_atomic_block:
+        raise TransactionManagementError(
+            'Снимок базы нельзя снять или восстановить внутри транзакции: '
+            'используйте SnapshotTestCase или transactional_db.'
+        )
+    connection.ensure_connection()
+    return connection.connection
+
+
+def take_snapshot(using=DEFAULT_DB_ALIAS):
+    snapshot = sqlite3.connect(':memory:')
+    sqlite_connection(using).backup(snapshot)
+    return snapshot
+
+
+def restore_snapshot(snapshot, using=DEFAULT_DB_ALIAS):
+    snapshot.backup(sqlite_connection(using))
+
+
+def load(name, using=DEFAULT_DB_ALIAS):
+    """Приводит базу к набору name, при первом вызове строит его."""
+    snapshot = snapshots.get((using, name))
+    if snapshot is not None:
+        restore_snapshot(snapshot, using)
+        return
+    if (using, CLEAN) in snapshots:
+        reset(using)
+    else:
+        snapshots[using, CLEAN] = take_snapshot(using)
+    builders[name]()
+    snapshots[using, name] = take_snapshot(using)
+
+
+def reset(using=DEFAULT_DB_ALIAS):
+    """Возвращает базу к состоянию до сборки первого набора."""
+    snapshot = snapshots.get((using, CLEAN))
+    if snapshot is not None:
+        restore_snapshot(snapshot, using)
+
+
+class SnapshotTestCase(TransactionTestCase):
+    """
+    TransactionTestCase, который перед каждым тестом загружает
+    набор данных из атрибута dataset.
+
+    Вместо очистки таблиц после теста восстанавливается чистый снимок.
+    """
+
+    dataset = None
+
+    def _fixture_setup(self):
+        super()._fixture_setup()
+        load(self.dataset)
+
+    def _fixture_teardown(self):
+        reset()
+
+
+@pytest.fixture
+def load_dataset(transactional_db):
+    """Фикстура, загружающая набор данных по имени."""
+    vendor = connections[DEFAULT_DB_ALIAS].vendor
+    if vendor != 'sqlite':
+        pytest.skip(f'Снимки базы есть только для SQLite, а не {vendor}.')
+    yield load
+    reset()